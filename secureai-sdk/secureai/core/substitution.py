@@ -0,0 +1,131 @@
+"""
+Multi-pattern string substitution.
+
+Replaces every occurrence of a set of literal strings in one scan, used to
+restore original values from protected text.
+"""
+
+import re
+from typing import Callable, Literal, Mapping, Optional
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
+
+def replace_all(text: str, replacements: Mapping[str, str]) -> str:
+    """
+    Replace all occurrences of the keys of replacements in text.
+
+    Matches are leftmost-longest and non-overlapping, so a key that is a
+    prefix of another key cannot shadow it. Uses a pyahocorasick automaton
+    when the library is installed, otherwise a single regex alternation.
+
+    Args:
+        text: Text to scan
+        replacements: Mapping of literal search strings to replacements
+
+    Returns:
+        Text with all keys replaced
+    """
+    if not replacements or not text:
+        return text
+
+    return compile_replacements(replacements)(text)
+
+
+def compile_replacements(
+    replacements: Mapping[str, str],
+    backend: Optional[Literal["automaton", "regex"]] = None,
+) -> Callable[[str], str]:
+    """
+    Build a reusable replace_all function for a fixed mapping.
+
+    Building the automaton or regex is the expensive step; callers that
+    apply the same mapping to many texts should compile it once.
+
+    Args:
+        replacements: Mapping of literal search strings to replacements.
+            It is copied, so later changes to it are not picked up.
+        backend: "automaton" for a pyahocorasick scan, linear in the text
+            length regardless of the key count; "regex" for a single
+            alternation, longest keys first. None picks the automaton when
+            pyahocorasick is installed. Both produce the same output.
+
+    Returns:
+        Function taking a text and returning it with all keys replaced
+
+    Raises:
+        ImportError: If backend is "automaton" and pyahocorasick is missing
+        ValueError: If backend is not a known backend
+    """
+    if backend is None:
+        backend = "automaton" if AHOCORASICK_AVAILABLE else "regex"
+
+    if backend == "automaton":
+        if not AHOCORASICK_AVAILABLE:
+            raise ImportError(
+                "pyahocorasick is not installed. "
+                "Install with: pip install secureai[fast-restore]"
+            )
+        return _compile_automaton(replacements)
+    if backend == "regex":
+        return _compile_regex(replacements)
+
+    raise ValueError(f"Unknown substitution backend: {backend}")
+
+
+def _unchanged(text: str) -> str:
+    return text
+
+
+def _compile_regex(replacements: Mapping[str, str]) -> Callable[[str], str]:
+    replacements = {key: value for key, value in replacements.items() if key}
+    if not replacements:
+        return _unchanged
+
+    keys = sorted(replacements, key=len, reverse=True)
+    pattern = re.compile("|".join(map(re.escape, keys)))
+    lookup = replacements.__getitem__
+
+    def replace(text: str) -> str:
+        return pattern.sub(lambda match: lookup(match.group(0)), text)
+
+    return replace
+
+
+def _compile_automaton(replacements: Mapping[str, str]) -> Callable[[str], str]:
+    automaton = ahocorasick.Automaton()
+    for key, value in replacements.items():
+        if key:
+            automaton.add_word(key, (len(key), value))
+    if len(automaton) == 0:
+        return _unchanged
+    automaton.make_automaton()
+
+    def replace(text: str) -> str:
+        if not text:
+            return text
+
+        # iter() reports every match, including overlapping ones; keep the
+        # leftmost-longest non-overlapping set to match the regex fallback
+        matches = sorted(
+            (end - length + 1, -length, value)
+            for end, (length, value) in automaton.iter(text)
+        )
+
+        parts = []
+        cursor = 0
+        for start, neg_length, value in matches:
+            if start < cursor:
+                continue
+            parts.append(text[cursor:start])
+            parts.append(value)
+            cursor = start - neg_length
+        parts.append(text[cursor:])
+        return "".join(parts)
+
+    return replace
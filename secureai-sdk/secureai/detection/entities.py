@@ -57,6 +57,11 @@ class EntityType(str, Enum):
         return self.value
 
 
+# Plain string for each entity type, usable with either an EntityType member
+# or its value (PIIEntity stores the value because of use_enum_values).
+ENTITY_TYPE_STR: dict[str, str] = {member: member.value for member in EntityType}
+
+
 class PIIEntity(BaseModel):
     """Model for a detected PII entity."""
 
@@ -125,6 +125,26 @@ class PIIPatterns:
         r"\b[A-Z][a-z]+\s+[A-Z][a-z]+\b"
     )
 
+    # Cheap necessary condition for any pattern above to match: a digit, an
+    # email/URL/JWT marker, a hex pair separator (MAC), two capitalized words
+    # (PERSON) or a credential keyword (API_KEY/PASSWORD). Text that does not
+    # match this cannot contain a regex-detectable entity.
+    PRESCAN: Pattern = re.compile(
+        r"\d|@|://|eyJ|[0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}|[A-Z][a-z]+\s+[A-Z][a-z]"
+        r"|(?i:api|access|secret|passw|pwd)"
+    )
+
+    # Per-pattern anchors: each one must occur somewhere in the text for its
+    # pattern to match, so detect() can skip patterns whose anchor is absent
+    DIGIT_ANCHOR: Pattern = re.compile(r"\d")
+    EMAIL_ANCHOR: Pattern = re.compile(r"@")
+    URL_ANCHOR: Pattern = re.compile(r"://")
+    MAC_ANCHOR: Pattern = re.compile(r"[:-]")
+    JWT_ANCHOR: Pattern = re.compile(r"eyJ")
+    API_KEY_ANCHOR: Pattern = re.compile(r"(?i:api|access|secret)")
+    PASSWORD_ANCHOR: Pattern = re.compile(r"(?i:passw|pwd)")
+    MRN_ANCHOR: Pattern = re.compile(r"(?i:mrn)")
+
     @classmethod
     def get_all_patterns(cls) -> dict[EntityType, Pattern]:
         """
@@ -154,6 +174,36 @@ class PIIPatterns:
             EntityType.PERSON: cls.PERSON,
         }
 
+    @classmethod
+    def get_anchors(cls) -> dict[EntityType, Pattern]:
+        """
+        Get the anchor pattern for each entity type that has one.
+        
+        Types without an anchor must always be scanned.
+        
+        Returns:
+            Dictionary mapping EntityType to its compiled anchor Pattern
+        """
+        return {
+            EntityType.SSN: cls.DIGIT_ANCHOR,
+            EntityType.CREDIT_CARD: cls.DIGIT_ANCHOR,
+            EntityType.EMAIL: cls.EMAIL_ANCHOR,
+            EntityType.PHONE: cls.DIGIT_ANCHOR,
+            EntityType.IP_ADDRESS: cls.DIGIT_ANCHOR,
+            EntityType.MAC_ADDRESS: cls.MAC_ANCHOR,
+            EntityType.URL: cls.URL_ANCHOR,
+            EntityType.ZIP_CODE: cls.DIGIT_ANCHOR,
+            EntityType.DATE_OF_BIRTH: cls.DIGIT_ANCHOR,
+            EntityType.API_KEY: cls.API_KEY_ANCHOR,
+            EntityType.JWT_TOKEN: cls.JWT_ANCHOR,
+            EntityType.PASSWORD: cls.PASSWORD_ANCHOR,
+            EntityType.BANK_ACCOUNT: cls.DIGIT_ANCHOR,
+            EntityType.IBAN: cls.DIGIT_ANCHOR,
+            EntityType.PASSPORT: cls.DIGIT_ANCHOR,
+            EntityType.MEDICAL_RECORD_NUMBER: cls.MRN_ANCHOR,
+            EntityType.COORDINATES: cls.DIGIT_ANCHOR,
+        }
+
     @classmethod
     def get_pattern(cls, entity_type: EntityType) -> Pattern | None:
         """
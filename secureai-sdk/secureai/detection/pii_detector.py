@@ -6,8 +6,9 @@ and optional NER (Named Entity Recognition).
 """
 
 import re
-from typing import Optional, List, Set
+from typing import ClassVar, Optional, List, Set, Pattern
 from collections import defaultdict
+from operator import attrgetter
 
 from secureai.detection.entities import EntityType, PIIEntity, DetectionResult
 from secureai.detection.patterns import PIIPatterns
@@ -36,6 +37,31 @@ class PIIDetector:
         'SSN'
     """
 
+    # Keywords that raise confidence when they appear just before a match
+    _CONFIDENCE_BOOSTS: ClassVar[dict[EntityType, tuple[str, ...]]] = {
+        EntityType.SSN: ("ssn", "social security", "social-security"),
+        EntityType.CREDIT_CARD: ("card", "credit", "cc", "payment"),
+        EntityType.EMAIL: ("email", "e-mail", "contact"),
+        EntityType.PHONE: ("phone", "tel", "call", "mobile"),
+        EntityType.API_KEY: ("api", "key", "token", "secret"),
+        EntityType.PASSWORD: ("password", "passwd", "pwd", "pass"),
+    }
+
+    # SSN area numbers that are never issued (000, 666, 900-999)
+    _INVALID_SSN_AREAS: ClassVar[frozenset[int]] = frozenset({0, 666, *range(900, 1000)})
+
+    # bytes.translate table taking ASCII '0'-'9' to the Luhn doubling step
+    # value: 2*d, minus 9 when that exceeds 9
+    _LUHN_DOUBLED: ClassVar[bytes] = bytes.maketrans(
+        b"0123456789", bytes((0, 2, 4, 6, 8, 1, 3, 5, 7, 9))
+    )
+
+    # Non-digits stripped from SSN and non-ASCII card matches (Unicode-aware like \d)
+    _NON_DIGITS: ClassVar[Pattern] = re.compile(r"\D")
+
+    # Every byte except ASCII 0-9, for stripping separators with bytes.translate
+    _NON_DIGIT_BYTES: ClassVar[bytes] = bytes(b for b in range(256) if not 0x30 <= b <= 0x39)
+
     def __init__(
         self,
         enabled_types: Optional[Set[EntityType]] = None,
@@ -61,16 +87,52 @@ class PIIDetector:
             for etype, pattern in self.patterns.items()
             if etype in self.enabled_types
         }
+        self._scan_plan = self._build_scan_plan(self.active_patterns)
+        
+        # Last (text, result) pair, shared by the convenience helpers below so
+        # that e.g. has_pii() followed by get_entity_counts() scans only once
+        self._last_detection: Optional[tuple[str, DetectionResult]] = None
+
+    def _build_scan_plan(
+        self, patterns: dict[EntityType, Pattern]
+    ) -> List[tuple[EntityType, Pattern, Optional[Pattern]]]:
+        """
+        Build the ordered list of (entity type, pattern, anchor) entries to scan.
+        
+        The simpler two-word PERSON pattern is scanned as its own entry after the
+        main PERSON pattern, so hits it shares with the main pattern are resolved
+        by the regular overlap pass instead of a separate dedup loop. Patterns
+        without an anchor are always scanned.
+        
+        Args:
+            patterns: Entity types to scan, mapped to their main pattern
+        
+        Returns:
+            Scan plan for _detect_with_regex
+        """
+        anchors = PIIPatterns.get_anchors()
+        plan = [
+            (etype, pattern, anchors.get(etype))
+            for etype, pattern in patterns.items()
+        ]
+        if EntityType.PERSON in patterns:
+            plan.append((EntityType.PERSON, PIIPatterns.PERSON_SIMPLE, None))
+        return plan
 
     def detect(self, text: str) -> DetectionResult:
         """
         Detect PII entities in text.
         
+        The entities are sorted by start position and never overlap, so
+        callers can substitute them in a single forward pass. Sorting the
+        list again is cheap: Timsort confirms an ordered list in one linear
+        pass.
+        
         Args:
             text: Text to scan for PII
         
         Returns:
-            DetectionResult with all detected entities
+            DetectionResult with all detected entities, ordered by start position
             
         Raises:
             DetectionError: If detection fails
@@ -82,32 +144,94 @@ class PIIDetector:
             entities: List[PIIEntity] = []
             
             # Run regex-based detection
-            entities.extend(self._detect_with_regex(text))
+            entities.extend(self._detect_with_regex(text, self._scan_plan))
             
             # Remove duplicates and overlaps
             entities = self._remove_duplicates(entities)
             
             # Sort by position
-            entities.sort(key=lambda e: e.start)
+            entities.sort(key=attrgetter("start"))
             
             return DetectionResult(text=text, entities=entities)
             
         except Exception as e:
             raise DetectionError(f"PII detection failed: {str(e)}") from e
 
-    def _detect_with_regex(self, text: str) -> List[PIIEntity]:
+    def detect_batch(self, texts: List[str]) -> List[DetectionResult]:
+        """
+        Detect PII entities in many texts at once.
+
+        Texts the prescan rules out skip the regex scan entirely, and
+        repeated texts are scanned once and share a result.
+
+        Args:
+            texts: Texts to scan for PII
+
+        Returns:
+            One DetectionResult per text, in input order
+
+        Raises:
+            DetectionError: If detection fails
+        """
+        seen: dict[str, DetectionResult] = {}
+        results: List[DetectionResult] = []
+
+        for text in texts:
+            result = seen.get(text)
+            if result is None:
+                if self.might_contain_pii(text):
+                    result = self.detect(text)
+                else:
+                    result = DetectionResult(text=text, entities=[])
+                seen[text] = result
+            results.append(result)
+
+        return results
+
+    def _detect_cached(self, text: str) -> DetectionResult:
+        """Return detect(text), reusing the previous result for the same text."""
+        last = self._last_detection
+        if last is not None and last[0] == text:
+            return last[1]
+        
+        result = self.detect(text)
+        self._last_detection = (text, result)
+        return result
+
+    def _detect_with_regex(
+        self, text: str, scan_plan: List[tuple[EntityType, Pattern, Optional[Pattern]]]
+    ) -> List[PIIEntity]:
         """
         Detect PII using regex patterns.
         
         Args:
             text: Text to scan
+            scan_plan: Entries from _build_scan_plan to run against the text
         
         Returns:
             List of detected entities
         """
         entities = []
         
-        for entity_type, pattern in self.active_patterns.items():
+        # Lowercase once for the keyword windows used by _calculate_confidence.
+        # Some characters change length when lowercased, which would shift
+        # offsets, so fall back to per-match lowering in that case.
+        text_lower: Optional[str] = text.lower()
+        if len(text_lower) != len(text):
+            text_lower = None
+        
+        # Many patterns share an anchor (most need a digit), so each anchor is
+        # searched at most once per text
+        anchor_hits: dict[Pattern, bool] = {}
+        
+        for entity_type, pattern, anchor in scan_plan:
+            if anchor is not None:
+                hit = anchor_hits.get(anchor)
+                if hit is None:
+                    hit = anchor_hits[anchor] = anchor.search(text) is not None
+                if not hit:
+                    continue
+            
             for match in pattern.finditer(text):
                 # Extract matched value
                 value = match.group(0)
@@ -115,7 +239,9 @@ class PIIDetector:
                 end = match.end()
                 
                 # Calculate confidence based on pattern specificity
-                confidence = self._calculate_confidence(entity_type, value, text, start, end)
+                confidence = self._calculate_confidence(
+                    entity_type, value, text, start, end, text_lower
+                )
                 
                 if confidence < self.min_confidence:
                     continue
@@ -136,45 +262,16 @@ class PIIDetector:
                 
                 entities.append(entity)
         
-        # Special case: Additional PERSON detection with simpler pattern
-        if EntityType.PERSON in self.enabled_types:
-            simple_person_pattern = PIIPatterns.PERSON_SIMPLE
-            for match in simple_person_pattern.finditer(text):
-                value = match.group(0)
-                start = match.start()
-                end = match.end()
-                
-                # Check if this person name is already detected
-                already_detected = any(
-                    entity.entity_type == EntityType.PERSON and 
-                    entity.value == value and 
-                    entity.start == start
-                    for entity in entities
-                )
-                
-                if not already_detected:
-                    # Calculate confidence for simple person pattern
-                    confidence = self._calculate_confidence(EntityType.PERSON, value, text, start, end)
-                    
-                    if confidence >= self.min_confidence:
-                        context = None
-                        if self.use_context:
-                            context = self._extract_context(text, start, end)
-                        
-                        entity = PIIEntity(
-                            entity_type=EntityType.PERSON,
-                            value=value,
-                            start=start,
-                            end=end,
-                            confidence=confidence,
-                            context=context
-                        )
-                        entities.append(entity)
-        
         return entities
 
     def _calculate_confidence(
-        self, entity_type: EntityType, value: str, text: str, start: int, end: int
+        self,
+        entity_type: EntityType,
+        value: str,
+        text: str,
+        start: int,
+        end: int,
+        text_lower: Optional[str] = None,
     ) -> float:
         """
         Calculate confidence score for detected entity.
@@ -190,6 +287,7 @@ class PIIDetector:
             text: Full text
             start: Start position
             end: End position
+            text_lower: Optional precomputed text.lower() with the same offsets
         
         Returns:
             Confidence score (0-1)
@@ -197,20 +295,14 @@ class PIIDetector:
         base_confidence = 0.8  # Base confidence for regex match
         
         # Check for contextual keywords before the match
-        context_before = text[max(0, start - 20):start].lower()
-        
-        confidence_boosts = {
-            EntityType.SSN: ["ssn", "social security", "social-security"],
-            EntityType.CREDIT_CARD: ["card", "credit", "cc", "payment"],
-            EntityType.EMAIL: ["email", "e-mail", "contact"],
-            EntityType.PHONE: ["phone", "tel", "call", "mobile"],
-            EntityType.API_KEY: ["api", "key", "token", "secret"],
-            EntityType.PASSWORD: ["password", "passwd", "pwd", "pass"],
-        }
+        if text_lower is not None:
+            context_before = text_lower[max(0, start - 20):start]
+        else:
+            context_before = text[max(0, start - 20):start].lower()
         
-        if entity_type in confidence_boosts:
-            if any(keyword in context_before for keyword in confidence_boosts[entity_type]):
-                base_confidence += 0.15
+        keywords = self._CONFIDENCE_BOOSTS.get(entity_type)
+        if keywords and any(keyword in context_before for keyword in keywords):
+            base_confidence += 0.15
         
         # Special validation for certain types
         if entity_type == EntityType.CREDIT_CARD:
@@ -221,11 +313,10 @@ class PIIDetector:
         
         if entity_type == EntityType.SSN:
             # Additional SSN validation
-            digits = re.sub(r'\D', '', value)
+            digits = self._NON_DIGITS.sub('', value)
             if len(digits) == 9:
                 # Check for invalid SSN patterns (000, 666, 900-999 in first 3 digits)
-                first_three = int(digits[:3])
-                if first_three == 0 or first_three == 666 or first_three >= 900:
+                if int(digits[:3]) in self._INVALID_SSN_AREAS:
                     base_confidence -= 0.5
         
         # Cap confidence at 1.0
@@ -241,22 +332,21 @@ class PIIDetector:
         Returns:
             True if valid, False otherwise
         """
-        # Remove non-digits
-        digits = [int(d) for d in re.sub(r'\D', '', card_number)]
+        # Remove non-digits. The patterns' \d also matches non-ASCII decimal
+        # digits, which are normalized to ASCII bytes on the slow path.
+        if card_number.isascii():
+            digits = card_number.encode("ascii").translate(None, self._NON_DIGIT_BYTES)
+        else:
+            digits = bytes(0x30 + int(d) for d in self._NON_DIGITS.sub("", card_number))
         
         if len(digits) < 13 or len(digits) > 19:
             return False
         
-        # Luhn algorithm
-        checksum = 0
-        reverse_digits = digits[::-1]
-        
-        for i, digit in enumerate(reverse_digits):
-            if i % 2 == 1:  # Every second digit from the right
-                digit *= 2
-                if digit > 9:
-                    digit -= 9
-            checksum += digit
+        # Luhn algorithm over the raw bytes; every second digit from the right
+        # is doubled via the translate table, and both halves are summed in C
+        kept = digits[-1::-2]
+        doubled = digits[-2::-2].translate(self._LUHN_DOUBLED)
+        checksum = sum(kept) - 0x30 * len(kept) + sum(doubled)
         
         return checksum % 10 == 0
 
@@ -299,59 +389,50 @@ class PIIDetector:
         # Sort by start position, then by confidence (descending)
         sorted_entities = sorted(entities, key=lambda e: (e.start, -e.confidence))
         
-        filtered = []
-        for entity in sorted_entities:
-            # Check if this entity overlaps with any already-filtered entity
-            overlaps = False
-            for existing in filtered:
-                if self._entities_overlap(entity, existing):
-                    overlaps = True
-                    # If new entity has higher confidence, replace
-                    if entity.confidence > existing.confidence:
-                        filtered.remove(existing)
-                        filtered.append(entity)
-                    break
-            
-            if not overlaps:
+        # Kept entities never overlap each other and are visited in start order,
+        # so a new entity can only overlap the most recently kept one
+        filtered = [sorted_entities[0]]
+        for entity in sorted_entities[1:]:
+            last = filtered[-1]
+            if entity.start < last.end:
+                # Overlap: keep whichever has higher confidence
+                if entity.confidence > last.confidence:
+                    filtered[-1] = entity
+            else:
                 filtered.append(entity)
         
         return filtered
 
-    def _entities_overlap(self, entity1: PIIEntity, entity2: PIIEntity) -> bool:
-        """Check if two entities overlap in text."""
-        return not (entity1.end <= entity2.start or entity2.end <= entity1.start)
-
     def detect_by_type(self, text: str, entity_type: EntityType) -> List[PIIEntity]:
         """
         Detect only specific type of PII.
         
+        Only the patterns for entity_type are scanned, whether or not the type
+        is in enabled_types, so matches are never dropped in favour of an
+        overlapping entity of another type.
+        
         Args:
             text: Text to scan
             entity_type: Specific entity type to detect
         
         Returns:
-            List of detected entities of specified type
+            List of detected entities of specified type, ordered by start position
+            
+        Raises:
+            DetectionError: If detection fails
         """
-        # Temporarily set enabled types to just the requested type
-        original_types = self.enabled_types
-        self.enabled_types = {entity_type}
-        self.active_patterns = {
-            etype: pattern
-            for etype, pattern in self.patterns.items()
-            if etype in self.enabled_types
-        }
+        pattern = self.patterns.get(entity_type)
+        if not text or pattern is None:
+            return []
         
         try:
-            result = self.detect(text)
-            return result.entities
-        finally:
-            # Restore original enabled types
-            self.enabled_types = original_types
-            self.active_patterns = {
-                etype: pattern
-                for etype, pattern in self.patterns.items()
-                if etype in self.enabled_types
-            }
+            scan_plan = self._build_scan_plan({entity_type: pattern})
+            entities = self._remove_duplicates(self._detect_with_regex(text, scan_plan))
+            entities.sort(key=attrgetter("start"))
+            return entities
+            
+        except Exception as e:
+            raise DetectionError(f"PII detection failed: {str(e)}") from e
 
     def get_entity_counts(self, text: str) -> dict[EntityType, int]:
         """
@@ -363,7 +444,7 @@ class PIIDetector:
         Returns:
             Dictionary mapping entity types to counts
         """
-        result = self.detect(text)
+        result = self._detect_cached(text)
         counts = defaultdict(int)
         
         for entity in result.entities:
@@ -371,6 +452,28 @@ class PIIDetector:
         
         return dict(counts)
 
+    def might_contain_pii(self, text: str) -> bool:
+        """
+        Cheap prescan that rules out text detect() cannot find anything in.
+        
+        A False result guarantees detect() returns no entities; True only
+        means detect() needs to run. The prescan only knows the built-in
+        patterns, so it is skipped for subclasses that override detect()
+        without also overriding this method.
+        
+        Args:
+            text: Text to check
+        
+        Returns:
+            False if text certainly contains no detectable PII
+        """
+        cls = type(self)
+        if cls.detect is not PIIDetector.detect and (
+            cls.might_contain_pii is PIIDetector.might_contain_pii
+        ):
+            return True
+        return PIIPatterns.PRESCAN.search(text) is not None
+
     def has_pii(self, text: str) -> bool:
         """
         Quick check if text contains any PII.
@@ -381,7 +484,7 @@ class PIIDetector:
         Returns:
             True if any PII detected, False otherwise
         """
-        result = self.detect(text)
+        result = self._detect_cached(text)
         return len(result.entities) > 0
 
 
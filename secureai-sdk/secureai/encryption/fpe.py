@@ -7,13 +7,44 @@ making it suitable for AI/ML workloads where data format matters.
 
 import hashlib
 import hmac
+import re
 import secrets
-from typing import Optional, Dict
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 
 from secureai.core.exceptions import EncryptionError
 
+# Runs of ASCII characters that FPE leaves in place (anything but digits
+# and letters)
+_ASCII_SPECIAL_RUNS = re.compile(r"([^0-9A-Za-z]+)")
+
+# Replacement character for each byte value, per character class
+_DIGITS_BY_BYTE = tuple(str(byte_val % 10) for byte_val in range(256))
+_UPPER_BY_BYTE = tuple(chr(ord('A') + byte_val % 26) for byte_val in range(256))
+_LOWER_BY_BYTE = tuple(chr(ord('a') + byte_val % 26) for byte_val in range(256))
+
+
+class _ByteTables(dict):
+    """Character -> its class's byte lookup table, precomputed for ASCII."""
+
+    def __missing__(self, char: str) -> tuple:
+        if char.isdigit():
+            return _DIGITS_BY_BYTE
+        if char.isalpha():
+            return _UPPER_BY_BYTE if char.isupper() else _LOWER_BY_BYTE
+        return (char,) * 256  # Not encryptable: stays as it is
+
+
+_BYTE_TABLES = _ByteTables()
+_BYTE_TABLES.update(
+    (chr(code), _BYTE_TABLES.__missing__(chr(code)))
+    for code in range(128)
+    if chr(code).isalnum()
+)
+
 
 class FPEEncryptor:
     """
@@ -31,17 +62,32 @@ class FPEEncryptor:
         '123-45-6789'  # Original value restored
     """
 
-    def __init__(self, key: str, tweak: Optional[str] = None):
+    _COUNTER_MASK = (1 << 128) - 1
+
+    def __init__(self, key: str, tweak: Optional[str] = None, cache_size: int = 4096):
         """
         Initialize FPE encryptor.
         
         Args:
             key: Master encryption key (will be hashed to create AES key)
             tweak: Optional tweak for additional security context
+            cache_size: Number of recent encryptions to keep (0 to disable)
         """
         self.key = self._derive_key(key)
         self.tweak = tweak or ""
-        self._cache: Dict[str, str] = {}  # Cache for deterministic results
+        self.cache_size = cache_size
+        # Cache for deterministic results, least recently used first
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # AES contexts are reused rather than set up per call. ECB on
+        # successive counter blocks is the CTR keystream. Each thread gets
+        # its own context, since a context must not be used concurrently.
+        self._cipher = Cipher(
+            algorithms.AES(self.key),
+            modes.ECB(),
+            backend=default_backend()
+        )
+        self._local = threading.local()
 
     def _derive_key(self, key: str) -> bytes:
         """Derive a 256-bit AES key from the master key."""
@@ -76,24 +122,22 @@ class FPEEncryptor:
 
         # Check cache for deterministic results
         cache_key = f"{entity_type}:{plaintext}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        if self.cache_size > 0:
+            with self._cache_lock:
+                if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
+                    return self._cache[cache_key]
 
         try:
-            # Separate data into components: digits, letters, and structure
-            structure, chars = self._extract_structure(plaintext)
-            
-            if not chars:
-                return plaintext  # No encryptable characters
-            
-            # Encrypt the character sequence
-            encrypted_chars = self._encrypt_chars(chars, entity_type)
-            
-            # Rebuild with original structure
-            result = self._rebuild_with_structure(structure, encrypted_chars)
+            # Encrypt the digits and letters, keeping the structure in place
+            result = self._transform_chars(plaintext, self._encrypt_chars, entity_type)
             
             # Cache result
-            self._cache[cache_key] = result
+            if self.cache_size > 0:
+                with self._cache_lock:
+                    self._cache[cache_key] = result
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
             
             return result
             
@@ -118,23 +162,47 @@ class FPEEncryptor:
             return ciphertext
 
         try:
-            # Extract structure and characters
-            structure, chars = self._extract_structure(ciphertext)
-            
-            if not chars:
-                return ciphertext
-            
-            # Decrypt the character sequence
-            decrypted_chars = self._decrypt_chars(chars, entity_type)
-            
-            # Rebuild with original structure
-            result = self._rebuild_with_structure(structure, decrypted_chars)
-            
-            return result
+            # Decrypt the digits and letters, keeping the structure in place
+            return self._transform_chars(ciphertext, self._decrypt_chars, entity_type)
             
         except Exception as e:
             raise EncryptionError(f"FPE decryption failed: {str(e)}") from e
 
+    def _transform_chars(
+        self, text: str, transform: Callable[[str, str], str], entity_type: str
+    ) -> str:
+        """
+        Apply transform to the encryptable characters of text.
+        
+        Digits and letters are passed to transform(chars, entity_type) as
+        one string; everything else stays in place. ASCII text is split
+        into runs with one regex call instead of classifying each
+        character in Python.
+        """
+        if text.isascii():
+            # Alternating encryptable and special runs, encryptable first
+            runs = _ASCII_SPECIAL_RUNS.split(text)
+            chars = "".join(runs[0::2])
+            if not chars:
+                return text  # No encryptable characters
+            
+            transformed = transform(chars, entity_type)
+            result = []
+            char_idx = 0
+            for i, run in enumerate(runs):
+                if i % 2:
+                    result.append(run)
+                else:
+                    result.append(transformed[char_idx : char_idx + len(run)])
+                    char_idx += len(run)
+            return "".join(result)
+        
+        structure, chars = self._extract_structure(text)
+        if not chars:
+            return text  # No encryptable characters
+        
+        return self._rebuild_with_structure(structure, transform(chars, entity_type))
+
     def _extract_structure(self, text: str) -> tuple[list, str]:
         """
         Extract structure template and encryptable characters.
@@ -191,20 +259,34 @@ class FPEEncryptor:
         iv_source = f"{chars}:{entity_type}:{self.tweak}"
         iv = hashlib.sha256(iv_source.encode()).digest()[:16]
         
-        # Encrypt
-        cipher = Cipher(
-            algorithms.AES(self.key),
-            modes.CTR(iv),
-            backend=default_backend()
-        )
-        encryptor = cipher.encryptor()
-        
+        # Encrypt (AES-CTR: XOR with the keystream for this IV)
         plaintext_bytes = chars.encode('utf-8')
-        ciphertext_bytes = encryptor.update(plaintext_bytes) + encryptor.finalize()
+        size = len(plaintext_bytes)
+        keystream = self._keystream(iv, size)
+        ciphertext_bytes = (
+            int.from_bytes(plaintext_bytes, "big") ^ int.from_bytes(keystream, "big")
+        ).to_bytes(size, "big")
         
         # Map encrypted bytes back to same character set
         return self._map_bytes_to_chars(ciphertext_bytes, chars)
 
+    def _keystream(self, iv: bytes, size: int) -> bytes:
+        """
+        AES-CTR keystream of size bytes for a 16-byte initial counter block.
+        
+        The counter blocks are encrypted with a single ECB update() call,
+        matching modes.CTR (big-endian 128-bit counter, wrapping).
+        """
+        counter = int.from_bytes(iv, "big")
+        blocks = b"".join(
+            ((counter + i) & self._COUNTER_MASK).to_bytes(16, "big")
+            for i in range(-(-size // 16))
+        )
+        block_cipher = getattr(self._local, "block_cipher", None)
+        if block_cipher is None:
+            block_cipher = self._local.block_cipher = self._cipher.encryptor()
+        return block_cipher.update(blocks)[:size]
+
     def _decrypt_chars(self, chars: str, entity_type: str) -> str:
         """Decrypt character sequence."""
         if not chars:
@@ -224,32 +306,21 @@ class FPEEncryptor:
         
         This ensures format preservation.
         """
-        # Determine character sets used
-        has_digits = any(c.isdigit() for c in original_chars)
-        has_letters = any(c.isalpha() for c in original_chars)
-        
-        result = []
-        for i, original_char in enumerate(original_chars):
-            # Use encrypted byte to select a character from the same set
-            byte_val = encrypted_bytes[i % len(encrypted_bytes)]
-            
-            if original_char.isdigit():
-                # Map to digit
-                new_digit = str(byte_val % 10)
-                result.append(new_digit)
-            elif original_char.isalpha():
-                # Map to letter
-                if original_char.isupper():
-                    new_char = chr(ord('A') + (byte_val % 26))
-                else:
-                    new_char = chr(ord('a') + (byte_val % 26))
-                result.append(new_char)
-            else:
-                result.append(original_char)
+        if len(encrypted_bytes) < len(original_chars):
+            # Cycle the bytes, as indexing them modulo their length would
+            repeats = -(-len(original_chars) // len(encrypted_bytes))
+            encrypted_bytes = encrypted_bytes * repeats
         
-        return "".join(result)
+        # Each character picks its replacement from the lookup table of its
+        # class (digit, upper, lower), indexed by the encrypted byte
+        tables = _BYTE_TABLES
+        return "".join([
+            tables[original_char][byte_val]
+            for original_char, byte_val in zip(original_chars, encrypted_bytes)
+        ])
 
     def clear_cache(self) -> None:
         """Clear the encryption cache."""
-        self._cache.clear()
+        with self._cache_lock:
+            self._cache.clear()
 
@@ -2,11 +2,14 @@
 
 import hashlib
 import secrets
-from typing import Optional
+from typing import Callable, Optional
 
 from secureai.encryption.strategies import MaskingStrategy
 from secureai.core.exceptions import EncryptionError
 
+# Every byte except ASCII 0-9, for deleting with bytes.translate
+_NON_DIGIT_BYTES = bytes(code for code in range(256) if not 0x30 <= code <= 0x39)
+
 
 class DataMasker:
     """
@@ -15,15 +18,37 @@ class DataMasker:
     Supports partial masking, full masking, hashing, redaction, and tokenization.
     """
 
-    def __init__(self, token_prefix: str = "TOK"):
+    # Hash algorithms for MaskingStrategy.HASH; both give 32-byte digests, so
+    # a shorter hash is always a prefix of a longer one for the same value
+    _HASH_ALGORITHMS = frozenset({"sha256", "blake2b"})
+
+    def __init__(self, token_prefix: str = "TOK", hash_algorithm: str = "sha256"):
         """
         Initialize data masker.
         
         Args:
             token_prefix: Prefix for generated tokens
+            hash_algorithm: Digest used by MaskingStrategy.HASH. "sha256"
+                (default) keeps hashes comparable with values already
+                stored; "blake2b" is faster but produces different hashes.
+        
+        Raises:
+            ValueError: If hash_algorithm is not supported
         """
+        if hash_algorithm not in self._HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {hash_algorithm}")
         self.token_prefix = token_prefix
+        self.hash_algorithm = hash_algorithm
         self._token_map: dict[str, str] = {}  # For tokenization lookups
+        
+        # Entity-type specific partial masking handlers
+        self._partial_handlers: dict[str, Callable[[str, int], str]] = {
+            "SSN": self._mask_ssn,
+            "CREDIT_CARD": self._mask_credit_card,
+            "EMAIL": self._mask_email,
+            "PHONE": self._mask_phone,
+            "IP_ADDRESS": self._mask_ip_address,
+        }
 
     def mask(
         self,
@@ -75,51 +100,61 @@ class DataMasker:
         
         Entity-type specific logic for better UX.
         """
-        length = len(value)
-        
-        if entity_type == "SSN":
-            # SSN format: 123-45-6789 → ***-**-6789
-            if "-" in value:
-                parts = value.split("-")
-                if len(parts) == 3:
-                    return f"***-**-{parts[-1]}"
-            # Fallback for non-formatted SSN
-            return "*" * (length - show_last) + value[-show_last:]
-        
-        elif entity_type == "CREDIT_CARD":
-            # Credit card: 4532-1234-5678-9010 → ****-****-****-9010
-            digits = value.replace("-", "").replace(" ", "")
-            last_four = digits[-4:]
-            return "****-****-****-" + last_four
-        
-        elif entity_type == "EMAIL":
-            # Email: john.smith@example.com → j***@example.com
-            if "@" in value:
-                local, domain = value.split("@", 1)
-                if len(local) > 0:
-                    return f"{local[0]}***@{domain}"
-            return "*" * (length - show_last) + value[-show_last:]
-        
-        elif entity_type == "PHONE":
-            # Phone: (555) 123-4567 → ***-***-4567
-            digits = "".join(c for c in value if c.isdigit())
-            if len(digits) >= 4:
-                last_four = digits[-4:]
-                return f"***-***-{last_four}"
-            return "*" * (length - show_last) + value[-show_last:]
-        
-        elif entity_type == "IP_ADDRESS":
-            # IP: 192.168.1.100 → 192.*.*.*
-            parts = value.split(".")
-            if len(parts) == 4:
-                return f"{parts[0]}.*.*.*"
-            return "*" * (length - show_last) + value[-show_last:]
-        
+        handler = self._partial_handlers.get(entity_type)
+        if handler is None:
+            return self._mask_default(value, show_last)
+        return handler(value, show_last)
+
+    def _mask_ssn(self, value: str, show_last: int) -> str:
+        """SSN format: 123-45-6789 → ***-**-6789"""
+        # Fast path for the canonical dashed layout
+        if len(value) == 11 and value[3] == "-" and value[6] == "-" and value.count("-") == 2:
+            return f"***-**-{value[7:]}"
+        if "-" in value:
+            parts = value.split("-")
+            if len(parts) == 3:
+                return f"***-**-{parts[-1]}"
+        # Fallback for non-formatted SSN
+        return "*" * (len(value) - show_last) + value[-show_last:]
+
+    def _mask_credit_card(self, value: str, show_last: int) -> str:
+        """Credit card: 4532-1234-5678-9010 → ****-****-****-9010"""
+        digits = value.replace("-", "").replace(" ", "")
+        last_four = digits[-4:]
+        return "****-****-****-" + last_four
+
+    def _mask_email(self, value: str, show_last: int) -> str:
+        """Email: john.smith@example.com → j***@example.com"""
+        if "@" in value:
+            local, domain = value.split("@", 1)
+            if len(local) > 0:
+                return f"{local[0]}***@{domain}"
+        return "*" * (len(value) - show_last) + value[-show_last:]
+
+    def _mask_phone(self, value: str, show_last: int) -> str:
+        """Phone: (555) 123-4567 → ***-***-4567"""
+        if value.isascii():
+            digits = value.encode("ascii").translate(None, _NON_DIGIT_BYTES).decode("ascii")
         else:
-            # Default: show last N characters
-            if length <= show_last:
-                return "*" * length
-            return "*" * (length - show_last) + value[-show_last:]
+            digits = "".join(c for c in value if c.isdigit())
+        if len(digits) >= 4:
+            last_four = digits[-4:]
+            return f"***-***-{last_four}"
+        return "*" * (len(value) - show_last) + value[-show_last:]
+
+    def _mask_ip_address(self, value: str, show_last: int) -> str:
+        """IP: 192.168.1.100 → 192.*.*.*"""
+        parts = value.split(".")
+        if len(parts) == 4:
+            return f"{parts[0]}.*.*.*"
+        return "*" * (len(value) - show_last) + value[-show_last:]
+
+    def _mask_default(self, value: str, show_last: int) -> str:
+        """Default: show last N characters"""
+        length = len(value)
+        if length <= show_last:
+            return "*" * length
+        return "*" * (length - show_last) + value[-show_last:]
 
     def _full_mask(self, value: str) -> str:
         """Completely mask the value with asterisks."""
@@ -131,7 +166,10 @@ class DataMasker:
         
         Useful for deduplication and matching without revealing the original value.
         """
-        hash_bytes = hashlib.sha256(value.encode()).digest()
+        if self.hash_algorithm == "blake2b":
+            hash_bytes = hashlib.blake2b(value.encode(), digest_size=32).digest()
+        else:
+            hash_bytes = hashlib.sha256(value.encode()).digest()
         # Convert to hex and truncate
         return hash_bytes.hex()[:length]
 
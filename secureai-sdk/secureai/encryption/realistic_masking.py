@@ -4,49 +4,168 @@ Generates realistic-looking fake data instead of random encrypted values
 """
 
 import hashlib
-from typing import Dict, List
+from functools import lru_cache
+from itertools import product
+from typing import Dict, Iterable, List, Tuple, Union
 from secureai.detection.entities import EntityType
 
 
+def _hash64(value: str) -> int:
+    """64-bit BLAKE2b hash of value"""
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+# Entity types masked like patient IDs (format-preserving digit shuffle)
+_PATIENT_ID_TYPES = frozenset(
+    entity_type for entity_type in EntityType
+    if "patient" in entity_type.value.lower() or "id" in entity_type.value.lower()
+)
+
+
+def _is_patient_id_type(entity_type: Union[EntityType, str]) -> bool:
+    """Whether entity_type is masked like a patient ID
+    
+    Custom type names that are not EntityType members (e.g. "MRN_PATIENT_ID")
+    qualify by the same substring rule used to build _PATIENT_ID_TYPES.
+    """
+    if entity_type in _PATIENT_ID_TYPES:
+        return True
+    if isinstance(entity_type, EntityType):
+        return False
+    name = str(entity_type).lower()
+    return "patient" in name or "id" in name
+
+
+# Maps every ASCII digit to "0", turning a value into its layout, e.g.
+# "HSP20251007-1452" -> "HSP00000000-0000"
+_LAYOUT_TABLE = str.maketrans("123456789", "000000000")
+
+
+@lru_cache(maxsize=1024)
+def _layout_digit_positions(layout: str) -> Tuple[int, ...]:
+    """Digit positions of a layout; computed once per distinct format"""
+    return tuple(i for i, char in enumerate(layout) if char == "0")
+
+
+def _digit_positions(text: str) -> Tuple[int, ...]:
+    """Positions of the digits in text"""
+    if text.isascii():
+        return _layout_digit_positions(text.translate(_LAYOUT_TABLE))
+    return tuple(i for i, char in enumerate(text) if char.isdigit())
+
+
+def _fill_digits(text: str, positions: Iterable[int], hash_val: int) -> str:
+    """Overwrite text at positions, in order, with successive base-10 digits of hash_val"""
+    if text.isascii():
+        buf = bytearray(text, "ascii")
+        for pos in positions:
+            hash_val, digit = divmod(hash_val, 10)
+            buf[pos] = 0x30 + digit
+        return buf.decode("ascii")
+    
+    chars = list(text)
+    for pos in positions:
+        hash_val, digit = divmod(hash_val, 10)
+        chars[pos] = "0123456789"[digit]
+    return "".join(chars)
+
+
+# Maps a digest byte to an ASCII digit
+_BYTE_TO_DIGIT = bytes(0x30 + b % 10 for b in range(256))
+
+
+def _digest_digits(value: str, count: int) -> bytes:
+    """count ASCII digits derived from BLAKE2b digests of value, one per byte"""
+    digest = hashlib.blake2b(
+        value.encode(), digest_size=min(max(count, 1), hashlib.blake2b.MAX_DIGEST_SIZE)
+    ).digest()
+    digits = digest.translate(_BYTE_TO_DIGIT)
+    # Longer than one digest: extend by hashing the previous digest
+    while len(digits) < count:
+        digest = hashlib.blake2b(digest).digest()
+        digits += digest.translate(_BYTE_TO_DIGIT)
+    return digits
+
+
+def _place_digits(text: str, positions: Iterable[int], digits: bytes) -> str:
+    """Overwrite text at positions with the given ASCII digits, in order"""
+    if text.isascii():
+        buf = bytearray(text, "ascii")
+        for pos, digit in zip(positions, digits):
+            buf[pos] = digit
+        return buf.decode("ascii")
+    
+    chars = list(text)
+    for pos, digit in zip(positions, digits):
+        chars[pos] = chr(digit)
+    return "".join(chars)
+
+
 class RealisticMasker:
     """
     Generate realistic fake data for masking sensitive information.
     Uses deterministic mapping so same input always gets same fake value.
     """
     
-    # Indian names for realistic substitution
-    INDIAN_FIRST_NAMES_MALE = [
+    # Indian names for realistic substitution. Table sizes are powers of two
+    # so a hash can be reduced to an index with a bit mask.
+    INDIAN_FIRST_NAMES_MALE = (
         "Arjun", "Rahul", "Amit", "Vikram", "Rajesh", "Suresh", "Anil", "Ravi",
         "Karthik", "Sanjay", "Manoj", "Deepak", "Nikhil", "Rohan", "Ashwin",
-        "Vivek", "Anand", "Harish", "Prakash", "Ganesh"
-    ]
+        "Vivek", "Anand", "Harish", "Prakash", "Ganesh", "Aditya", "Varun",
+        "Siddharth", "Kiran", "Naveen", "Sunil", "Ajay", "Mohan", "Gopal",
+        "Rakesh", "Arvind", "Dinesh"
+    )
     
-    INDIAN_FIRST_NAMES_FEMALE = [
+    INDIAN_FIRST_NAMES_FEMALE = (
         "Priya", "Anjali", "Neha", "Kavita", "Sunita", "Rekha", "Meena", "Asha",
         "Divya", "Pooja", "Swati", "Nisha", "Ritu", "Geeta", "Smita",
-        "Shweta", "Anita", "Maya", "Radha", "Sita"
-    ]
+        "Shweta", "Anita", "Maya", "Radha", "Sita", "Lakshmi", "Aarti",
+        "Deepa", "Kavya", "Sneha", "Usha", "Lata", "Shobha", "Pallavi",
+        "Rashmi", "Jyoti", "Vidya"
+    )
     
-    INDIAN_LAST_NAMES = [
+    INDIAN_LAST_NAMES = (
         "Kumar", "Singh", "Sharma", "Patel", "Reddy", "Nair", "Iyer", "Rao",
         "Gupta", "Verma", "Menon", "Shah", "Desai", "Joshi", "Agarwal",
-        "Chopra", "Malhotra", "Kapoor", "Mehta", "Pillai"
-    ]
+        "Chopra", "Malhotra", "Kapoor", "Mehta", "Pillai", "Bhat", "Kulkarni",
+        "Chatterjee", "Banerjee", "Mishra", "Pandey", "Saxena", "Bose", "Das",
+        "Krishnan", "Naidu", "Trivedi"
+    )
     
-    DOCTOR_NAMES = [
+    DOCTOR_NAMES = (
         "Dr. Priya Mehta", "Dr. Rajesh Kumar", "Dr. Anita Sharma", "Dr. Vikram Singh",
         "Dr. Sunita Patel", "Dr. Anil Reddy", "Dr. Kavita Nair", "Dr. Manoj Iyer",
-        "Dr. Neha Gupta", "Dr. Arjun Rao", "Dr. Pooja Verma", "Dr. Rahul Desai"
-    ]
+        "Dr. Neha Gupta", "Dr. Arjun Rao", "Dr. Pooja Verma", "Dr. Rahul Desai",
+        "Dr. Lakshmi Menon", "Dr. Sanjay Joshi", "Dr. Deepa Kapoor", "Dr. Harish Pillai"
+    )
+    
+    ADDRESSES = (
+        "45, MG Road, Koramangala, Bengaluru, Karnataka, India",
+        "23, Residency Road, Jayanagar, Bengaluru, Karnataka, India",
+        "67, Infantry Road, Ashok Nagar, Bengaluru, Karnataka, India",
+        "89, Brigade Road, Shantinagar, Bengaluru, Karnataka, India",
+        "34, Richmond Road, Indiranagar, Bengaluru, Karnataka, India",
+        "12, Church Street, Shivajinagar, Bengaluru, Karnataka, India",
+        "56, Hosur Road, Bommanahalli, Bengaluru, Karnataka, India",
+        "78, Bannerghatta Road, JP Nagar, Bengaluru, Karnataka, India"
+    )
+    
+    _FIRST_NAME_MASK = len(INDIAN_FIRST_NAMES_MALE) - 1
+    _LAST_NAME_MASK = len(INDIAN_LAST_NAMES) - 1
+    _DOCTOR_NAME_MASK = len(DOCTOR_NAMES) - 1
+    _ADDRESS_MASK = len(ADDRESSES) - 1
+    
+    # Every "First Last" combination, indexed by (first_idx << bits) | last_idx
+    _LAST_NAME_BITS = _LAST_NAME_MASK.bit_length()
+    _FULL_NAMES = tuple(map(" ".join, product(INDIAN_FIRST_NAMES_MALE, INDIAN_LAST_NAMES)))
     
     def __init__(self):
         self._name_cache: Dict[str, str] = {}
         self._doctor_cache: Dict[str, str] = {}
-    
-    def _deterministic_index(self, value: str, max_idx: int) -> int:
-        """Get deterministic index from hash of value"""
-        hash_val = int(hashlib.md5(value.encode()).hexdigest(), 16)
-        return hash_val % max_idx
+        # fake -> original, kept in step with the caches above
+        self._reverse_map: Dict[str, str] = {}
     
     def mask_person_name(self, name: str) -> str:
         """
@@ -67,26 +186,16 @@ class RealisticMasker:
         
         if len(parts) == 1:
             # Single name - just use first name
-            idx = self._deterministic_index(name, len(self.INDIAN_FIRST_NAMES_MALE))
+            idx = _hash64(name) & self._FIRST_NAME_MASK
             fake_name = self.INDIAN_FIRST_NAMES_MALE[idx]
-        elif len(parts) == 2:
-            # First + Last name
-            first_idx = self._deterministic_index(parts[0], len(self.INDIAN_FIRST_NAMES_MALE))
-            last_idx = self._deterministic_index(parts[1], len(self.INDIAN_LAST_NAMES))
-            
-            fake_first = self.INDIAN_FIRST_NAMES_MALE[first_idx]
-            fake_last = self.INDIAN_LAST_NAMES[last_idx]
-            fake_name = f"{fake_first} {fake_last}"
         else:
-            # Multiple names - use first and last part
-            first_idx = self._deterministic_index(parts[0], len(self.INDIAN_FIRST_NAMES_MALE))
-            last_idx = self._deterministic_index(parts[-1], len(self.INDIAN_LAST_NAMES))
-            
-            fake_first = self.INDIAN_FIRST_NAMES_MALE[first_idx]
-            fake_last = self.INDIAN_LAST_NAMES[last_idx]
-            fake_name = f"{fake_first} {fake_last}"
+            # First + Last name; with middle names, use first and last part
+            first_idx = _hash64(parts[0]) & self._FIRST_NAME_MASK
+            last_idx = _hash64(parts[-1]) & self._LAST_NAME_MASK
+            fake_name = self._FULL_NAMES[(first_idx << self._LAST_NAME_BITS) | last_idx]
         
         self._name_cache[name] = fake_name
+        self._reverse_map[fake_name] = name
         return fake_name
     
     def mask_doctor_name(self, name: str) -> str:
@@ -102,10 +211,11 @@ class RealisticMasker:
         if name in self._doctor_cache:
             return self._doctor_cache[name]
         
-        idx = self._deterministic_index(name, len(self.DOCTOR_NAMES))
+        idx = _hash64(name) & self._DOCTOR_NAME_MASK
         fake_name = self.DOCTOR_NAMES[idx]
         
         self._doctor_cache[name] = fake_name
+        self._reverse_map[fake_name] = name
         return fake_name
     
     def mask_phone_number(self, phone: str) -> str:
@@ -118,24 +228,17 @@ class RealisticMasker:
         Returns:
             Fake phone with same format (e.g., "+91-8765432109")
         """
-        # Extract digits
-        digits = ''.join(c for c in phone if c.isdigit())
+        # Positions of the digits to replace
+        digit_positions = _digit_positions(phone)
         
         # Generate fake digits deterministically
-        hash_val = int(hashlib.md5(phone.encode()).hexdigest(), 16)
-        fake_digits = str(hash_val % (10 ** len(digits))).zfill(len(digits))
-        
-        # Preserve original format
-        result = ""
-        digit_idx = 0
-        for char in phone:
-            if char.isdigit():
-                result += fake_digits[digit_idx]
-                digit_idx += 1
-            else:
-                result += char
+        hash_val = int.from_bytes(
+            hashlib.blake2b(phone.encode(), digest_size=16).digest(), "big"
+        )
         
-        return result
+        # Least significant digit last, so the result reads as
+        # hash_val % 10**n zero-padded into the original format
+        return _fill_digits(phone, reversed(digit_positions), hash_val)
     
     def mask_address(self, address: str) -> str:
         """
@@ -147,16 +250,7 @@ class RealisticMasker:
         Returns:
             Fake address with similar structure
         """
-        addresses = [
-            "45, MG Road, Koramangala, Bengaluru, Karnataka, India",
-            "23, Residency Road, Jayanagar, Bengaluru, Karnataka, India",
-            "67, Infantry Road, Ashok Nagar, Bengaluru, Karnataka, India",
-            "89, Brigade Road, Shantinagar, Bengaluru, Karnataka, India",
-            "34, Richmond Road, Indiranagar, Bengaluru, Karnataka, India"
-        ]
-        
-        idx = self._deterministic_index(address, len(addresses))
-        return addresses[idx]
+        return self.ADDRESSES[_hash64(address) & self._ADDRESS_MASK]
     
     def mask_patient_id(self, patient_id: str) -> str:
         """
@@ -168,19 +262,10 @@ class RealisticMasker:
         Returns:
             Fake ID with same format (e.g., "HSP20251012-3784")
         """
-        # Extract pattern
-        hash_val = int(hashlib.md5(patient_id.encode()).hexdigest(), 16)
-        
-        # Preserve prefix and generate fake numbers
-        result = ""
-        for char in patient_id:
-            if char.isdigit():
-                result += str(hash_val % 10)
-                hash_val //= 10
-            else:
-                result += char
-        
-        return result
+        # Preserve prefix and generate one fake digit per digest byte
+        digit_positions = _digit_positions(patient_id)
+        digits = _digest_digits(patient_id, len(digit_positions))
+        return _place_digits(patient_id, digit_positions, digits)
     
     def mask_value(self, value: str, entity_type: EntityType) -> str:
         """
@@ -195,7 +280,7 @@ class RealisticMasker:
         """
         if entity_type == EntityType.PERSON:
             # Check if it's a doctor name
-            if value.lower().startswith("dr.") or value.lower().startswith("doctor"):
+            if value[:6].lower().startswith(("dr.", "doctor")):
                 return self.mask_doctor_name(value)
             return self.mask_person_name(value)
         
@@ -205,7 +290,7 @@ class RealisticMasker:
         elif entity_type == EntityType.ADDRESS:
             return self.mask_address(value)
         
-        elif "patient" in str(entity_type).lower() or "id" in str(entity_type).lower():
+        elif _is_patient_id_type(entity_type):
             return self.mask_patient_id(value)
         
         else:
@@ -219,14 +304,4 @@ class RealisticMasker:
         Returns:
             Dictionary mapping fake values to original values
         """
-        reverse_map = {}
-        
-        # Reverse name mappings
-        for original, fake in self._name_cache.items():
-            reverse_map[fake] = original
-        
-        for original, fake in self._doctor_cache.items():
-            reverse_map[fake] = original
-        
-        return reverse_map
-
+        return dict(self._reverse_map)
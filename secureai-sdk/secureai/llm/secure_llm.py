@@ -6,14 +6,16 @@ Provides automatic PII protection for LLM API calls (OpenAI, Anthropic, etc.).
 
 from typing import Optional, Dict, Any, List
 import logging
+from operator import attrgetter
 
 from secureai.llm.providers import LLMProvider
 from secureai.detection.pii_detector import PIIDetector
-from secureai.detection.entities import PIIEntity
+from secureai.detection.entities import ENTITY_TYPE_STR, PIIEntity
 from secureai.encryption.fpe import FPEEncryptor
 from secureai.encryption.masker import DataMasker
 from secureai.policy.manager import PolicyManager
 from secureai.core.exceptions import SecureAIError
+from secureai.core.substitution import replace_all
 
 logger = logging.getLogger(__name__)
 
@@ -173,26 +175,29 @@ class SecureLLM:
         Returns:
             Protected prompt with PII encrypted
         """
-        protected = prompt
+        parts: List[str] = []
+        cursor = 0
         
-        # Sort entities by position (reverse) to maintain string positions
-        sorted_entities = sorted(entities, key=lambda e: e.start, reverse=True)
-        
-        for entity in sorted_entities:
+        # Walk entities in position order, copying the text between them once.
+        # Sort anyway, as detector subclasses need not keep detect()'s order.
+        for entity in sorted(entities, key=attrgetter("start")):
+            if entity.start < cursor:
+                continue  # Overlaps an entity that was already replaced
+            
             # Encrypt the entity value using FPE
             encrypted_value = self.encryptor.encrypt(
-                entity.value, str(entity.entity_type)
+                entity.value, ENTITY_TYPE_STR[entity.entity_type]
             )
             
             # Store mapping for later restoration
             self._entity_map[encrypted_value] = entity.value
             
-            # Replace in prompt
-            protected = (
-                protected[: entity.start] + encrypted_value + protected[entity.end :]
-            )
+            parts.append(prompt[cursor : entity.start])
+            parts.append(encrypted_value)
+            cursor = entity.end
         
-        return protected
+        parts.append(prompt[cursor:])
+        return "".join(parts)
 
     def _restore_response(self, response: str) -> str:
         """
@@ -204,13 +209,8 @@ class SecureLLM:
         Returns:
             Response with original PII restored
         """
-        restored = response
-        
-        # Replace encrypted values with original values
-        for encrypted, original in self._entity_map.items():
-            restored = restored.replace(encrypted, original)
-        
-        return restored
+        # Replace all encrypted values in a single scan
+        return replace_all(response, self._entity_map)
 
     def _call_llm(
         self,
@@ -5,13 +5,19 @@ This module provides a logging filter that automatically detects and masks
 PII in log messages before they are written to console, file, or other handlers.
 """
 
+import hashlib
 import logging
-from typing import Optional
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+from typing import ClassVar, Dict, List, Optional, Tuple
 
 from secureai.detection.pii_detector import PIIDetector
-from secureai.detection.entities import EntityType
+from secureai.detection.entities import ENTITY_TYPE_STR, EntityType
 from secureai.encryption.masker import DataMasker
+from secureai.encryption.strategies import MaskingStrategy
 from secureai.policy.manager import PolicyManager
+from secureai.policy.models import Policy
 
 
 class SecureAILogFilter(logging.Filter):
@@ -34,11 +40,29 @@ class SecureAILogFilter(logging.Filter):
         >>> # Actual output: "User SSN is ***-**-6789"
     """
 
+    # Set on records this filter masked PII in, to the policy manager the
+    # masking followed; a filter sharing that manager skips the record
+    _PROTECTED_ATTR: ClassVar[str] = "_secureai_protected"
+    _NOT_PROTECTED: ClassVar[object] = object()
+
+    # Default strategies for logs when no policy rule applies
+    _DEFAULT_STRATEGIES: ClassVar[Dict[EntityType, MaskingStrategy]] = {
+        EntityType.SSN: MaskingStrategy.PARTIAL_MASK,
+        EntityType.CREDIT_CARD: MaskingStrategy.PARTIAL_MASK,
+        EntityType.EMAIL: MaskingStrategy.PARTIAL_MASK,
+        EntityType.PHONE: MaskingStrategy.PARTIAL_MASK,
+        EntityType.IP_ADDRESS: MaskingStrategy.PARTIAL_MASK,
+        EntityType.API_KEY: MaskingStrategy.FULL_MASK,
+        EntityType.PASSWORD: MaskingStrategy.REDACT,
+        EntityType.JWT_TOKEN: MaskingStrategy.FULL_MASK,
+    }
+
     def __init__(
         self,
         policy_manager: Optional[PolicyManager] = None,
         detector: Optional[PIIDetector] = None,
         masker: Optional[DataMasker] = None,
+        cache_size: int = 1024,
     ):
         """
         Initialize log filter.
@@ -47,11 +71,29 @@ class SecureAILogFilter(logging.Filter):
             policy_manager: Policy manager for getting masking rules
             detector: PII detector (creates new if not provided)
             masker: Data masker (creates new if not provided)
+            cache_size: Number of recent messages whose protected form is
+                remembered (0 disables the cache). Entries are keyed by a
+                digest of the message, so raw messages are not retained;
+                the cached values are the already-masked messages.
         """
         super().__init__()
         self.policy_manager = policy_manager
         self.detector = detector or PIIDetector(min_confidence=0.5)  # Lower threshold for logs
         self.masker = masker or DataMasker()
+        
+        # LRU of message digest -> protected message (None when the message
+        # has no PII). Templated log lines repeat heavily, so this skips
+        # detection for most of them. Entries are only valid for the policy
+        # they were computed under.
+        self.cache_size = cache_size
+        self._message_cache: OrderedDict[bytes, Optional[str]] = OrderedDict()
+        self._cache_policy: Optional[Policy] = None
+        self._cache_lock = threading.Lock()
+        # Resolved log strategy per entity type, valid for one policy. The
+        # tuple is replaced, never mutated across policies.
+        self._strategy_cache: Tuple[Optional[Policy], Dict[EntityType, MaskingStrategy]] = (
+            None, {}
+        )
 
     def filter(self, record: logging.LogRecord) -> bool:
         """
@@ -63,26 +105,27 @@ class SecureAILogFilter(logging.Filter):
         Returns:
             True (always allow the log, just modify it)
         """
+        # A record can pass through several protection filters (e.g. one on
+        # the logger and one on a handler); filters following the same
+        # policy manager scan it only once
+        protected_by = getattr(record, self._PROTECTED_ATTR, self._NOT_PROTECTED)
+        if protected_by is self.policy_manager:
+            return True
+        
         try:
             # Get the formatted message
             original_message = record.getMessage()
             
-            # Detect PII in message
-            detection_result = self.detector.detect(original_message)
-            
-            if detection_result.entity_count == 0:
+            protected_message = self._protect_cached(original_message)
+            if protected_message is None:
                 # No PII found, allow original message
                 return True
             
-            # Apply masking to detected entities
-            protected_message = self._protect_message(
-                original_message, detection_result.entities
-            )
-            
             # Update the record's message
             # We modify the msg and clear args to prevent double formatting
             record.msg = protected_message
             record.args = ()
+            setattr(record, self._PROTECTED_ATTR, self.policy_manager)
             
         except Exception as e:
             # If protection fails, log the error but don't block the original log
@@ -96,6 +139,66 @@ class SecureAILogFilter(logging.Filter):
         
         return True
 
+    def _protect_cached(self, message: str) -> Optional[str]:
+        """
+        Protect message, reusing the result for recently seen messages.
+        
+        Args:
+            message: Formatted log message
+        
+        Returns:
+            Protected message, or None if the message contains no PII
+        """
+        if self.cache_size <= 0:
+            return self._protect_uncached(message)
+        
+        # Key by digest so unprotected messages are never kept in memory
+        key = hashlib.blake2b(
+            message.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+        policy = self._current_policy()
+        with self._cache_lock:
+            if policy is not self._cache_policy:
+                self._message_cache.clear()
+                self._cache_policy = policy
+            elif key in self._message_cache:
+                self._message_cache.move_to_end(key)
+                return self._message_cache[key]
+        
+        protected = self._protect_uncached(message)
+        
+        with self._cache_lock:
+            self._message_cache[key] = protected
+            if len(self._message_cache) > self.cache_size:
+                self._message_cache.popitem(last=False)
+        
+        return protected
+
+    def _protect_uncached(self, message: str) -> Optional[str]:
+        """Detect and mask PII in message, or return None if there is none."""
+        # Most log lines carry no PII; skip full detection when a cheap
+        # prescan already rules it out
+        if not self.detector.might_contain_pii(message):
+            return None
+        
+        # Detect PII in message
+        detection_result = self.detector.detect(message)
+        
+        if detection_result.entity_count == 0:
+            return None
+        
+        # Apply masking to detected entities
+        return self._protect_message(message, detection_result.entities)
+
+    def _current_policy(self) -> Optional[Policy]:
+        """Policy the cached results depend on, if any."""
+        if self.policy_manager is None:
+            return None
+        try:
+            return self.policy_manager.get_policy()
+        except Exception:
+            return None
+
     def _protect_message(self, message: str, entities: list) -> str:
         """
         Protect message by masking detected PII entities.
@@ -107,26 +210,34 @@ class SecureAILogFilter(logging.Filter):
         Returns:
             Protected message with PII masked
         """
-        protected = message
+        # Keep entities in position order, skipping any that overlap one
+        # already kept
+        kept = []
+        end = 0
+        for entity in sorted(entities, key=attrgetter("start")):
+            if entity.start < end:
+                continue
+            kept.append(entity)
+            end = entity.end
         
-        # Sort entities by position (reverse) to maintain string positions
-        sorted_entities = sorted(entities, key=lambda e: e.start, reverse=True)
+        # Get masking strategies from policy in one lookup
+        strategies = self._get_strategies_for_entities([entity.entity_type for entity in kept])
         
-        for entity in sorted_entities:
-            # Get masking strategy from policy
-            strategy = self._get_strategy_for_entity(entity.entity_type)
-            
+        # Copy the text between entities once
+        parts = []
+        cursor = 0
+        for entity, strategy in zip(kept, strategies):
             # Mask the value
             masked_value = self.masker.mask(
-                entity.value, strategy, entity_type=str(entity.entity_type)
+                entity.value, strategy, entity_type=ENTITY_TYPE_STR[entity.entity_type]
             )
             
-            # Replace in message
-            protected = (
-                protected[: entity.start] + masked_value + protected[entity.end :]
-            )
+            parts.append(message[cursor : entity.start])
+            parts.append(masked_value)
+            cursor = entity.end
         
-        return protected
+        parts.append(message[cursor:])
+        return "".join(parts)
 
     def _get_strategy_for_entity(self, entity_type: EntityType):
         """
@@ -138,29 +249,53 @@ class SecureAILogFilter(logging.Filter):
         Returns:
             Masking strategy to use
         """
+        return self._get_strategies_for_entities([entity_type])[0]
+
+    def _get_strategies_for_entities(self, entity_types: List[EntityType]) -> List[MaskingStrategy]:
+        """
+        Get masking strategies for several entity types with one policy lookup.
+        
+        Args:
+            entity_types: Types of entities
+        
+        Returns:
+            Masking strategy for each entity type, in input order
+        """
+        policy = self._current_policy()
+        cached_policy, resolved = self._strategy_cache
+        if cached_policy is not policy:
+            resolved = {}
+        
+        missing = [
+            entity_type for entity_type in dict.fromkeys(entity_types)
+            if entity_type not in resolved
+        ]
+        if not missing:
+            return [resolved[entity_type] for entity_type in entity_types]
+        
+        rules = [None] * len(missing)
+        # Only results backed by a policy lookup (or by having no policy
+        # manager at all) are cacheable; a failed lookup is retried
+        cacheable = self.policy_manager is None or policy is not None
         if self.policy_manager:
             try:
-                rule = self.policy_manager.get_rule(entity_type, context="logs")
-                if rule:
-                    return rule.strategy
+                rules = self.policy_manager.get_rules_batch(
+                    [(entity_type, "logs") for entity_type in missing]
+                )
             except Exception:
-                pass  # Fall back to default
-        
-        # Default strategies for logs
-        from secureai.encryption.strategies import MaskingStrategy
+                cacheable = False  # Fall back to default
         
-        defaults = {
-            EntityType.SSN: MaskingStrategy.PARTIAL_MASK,
-            EntityType.CREDIT_CARD: MaskingStrategy.PARTIAL_MASK,
-            EntityType.EMAIL: MaskingStrategy.PARTIAL_MASK,
-            EntityType.PHONE: MaskingStrategy.PARTIAL_MASK,
-            EntityType.IP_ADDRESS: MaskingStrategy.PARTIAL_MASK,
-            EntityType.API_KEY: MaskingStrategy.FULL_MASK,
-            EntityType.PASSWORD: MaskingStrategy.REDACT,
-            EntityType.JWT_TOKEN: MaskingStrategy.FULL_MASK,
-        }
+        strategies = dict(resolved)
+        for entity_type, rule in zip(missing, rules):
+            strategies[entity_type] = (
+                rule.strategy
+                if rule
+                else self._DEFAULT_STRATEGIES.get(entity_type, MaskingStrategy.PARTIAL_MASK)
+            )
+        if cacheable:
+            self._strategy_cache = (policy, strategies)
         
-        return defaults.get(entity_type, MaskingStrategy.PARTIAL_MASK)
+        return [strategies[entity_type] for entity_type in entity_types]
 
 
 def install_log_protection(
@@ -171,6 +306,8 @@ def install_log_protection(
     Install log protection on a logger (or root logger).
     
     This is a convenience function to quickly add PII protection to logging.
+    Installing again on the same logger with the same policy manager
+    returns the filter already installed instead of adding another.
     
     Args:
         policy_manager: Optional policy manager
@@ -193,6 +330,13 @@ def install_log_protection(
     if logger is None:
         logger = logging.getLogger()  # Root logger
     
+    for existing in logger.filters:
+        if (
+            isinstance(existing, SecureAILogFilter)
+            and existing.policy_manager is policy_manager
+        ):
+            return existing
+    
     log_filter = SecureAILogFilter(policy_manager=policy_manager)
     logger.addFilter(log_filter)
     
@@ -4,14 +4,33 @@ Policy Manager.
 Manages policy synchronization from central platform, caching, and offline mode.
 """
 
+import heapq
+import itertools
+import json
+import random
 import threading
 import time
-from typing import Optional, Dict, Any
+import weakref
+from collections import deque
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from datetime import datetime, timedelta
 import logging
 
 import httpx
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 from secureai.policy.models import Policy, MaskingRule
 from secureai.detection.entities import EntityType
 from secureai.encryption.strategies import MaskingStrategy
@@ -20,6 +39,97 @@ from secureai.core.exceptions import PolicyError, NetworkError
 logger = logging.getLogger(__name__)
 
 
+def _parse_json(content: bytes) -> Any:
+    """Parse a JSON response body, with orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class _SyncScheduler:
+    """
+    Runs background policy syncs for every PolicyManager on one thread.
+    
+    Managers are kept in a heap ordered by their next due time and held by
+    weak reference, so a manager that is garbage collected simply drops out.
+    Syncs run one at a time; each is bounded by the HTTP client timeout.
+    An exception from one manager's sync is logged and that manager is
+    rescheduled, so it can never stop syncs for the others.
+    """
+
+    _shared: Optional["_SyncScheduler"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._queue: List[Tuple[float, int, weakref.ref]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="PolicySync")
+        self._thread.start()
+
+    @classmethod
+    def shared(cls) -> "_SyncScheduler":
+        """Return the process-wide scheduler, starting it on first use."""
+        with cls._shared_lock:
+            if cls._shared is None or not cls._shared.is_alive():
+                cls._shared = cls()
+            return cls._shared
+
+    def is_alive(self) -> bool:
+        """Whether the scheduler thread is running."""
+        return self._thread.is_alive()
+
+    def schedule(self, manager: "PolicyManager", delay: float) -> None:
+        """Run manager._sync_once() after delay seconds."""
+        entry = (time.monotonic() + delay, next(self._sequence), weakref.ref(manager))
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            self._condition.notify()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the scheduler thread, dropping pending syncs.
+        
+        A sync already running finishes first; the call waits up to
+        timeout seconds for the thread to exit.
+        """
+        with self._condition:
+            self._stopped = True
+            self._queue.clear()
+            self._condition.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        return
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                _, _, manager_ref = heapq.heappop(self._queue)
+            
+            manager = manager_ref()
+            if manager is None:
+                continue
+            # stop() takes the same lock, so it waits for an in-flight sync
+            # before closing the client
+            with manager._sync_running:
+                if manager._stop_sync.is_set():
+                    continue
+                try:
+                    delay = manager._sync_once()
+                except Exception:
+                    logger.exception("Background policy sync raised unexpectedly")
+                    delay = max(float(manager.sync_interval), 1.0)
+                self.schedule(manager, delay)
+            del manager
+
+
 class PolicyManager:
     """
     Manages policies with background sync from central platform.
@@ -40,6 +150,11 @@ class PolicyManager:
         >>> rule = manager.get_rule(EntityType.SSN, context="logs")
     """
 
+    # Upper bound on cached (entity_type, context) lookups per policy
+    _RULE_CACHE_SIZE = 256
+    # Longest wait between retries after consecutive sync failures (seconds)
+    _MAX_BACKOFF = 1800.0
+
     def __init__(
         self,
         api_key: str,
@@ -67,18 +182,44 @@ class PolicyManager:
         self.offline_mode = offline_mode
         self.fallback_policy = fallback_policy
         
-        # Cached policy
+        # Cached policy. Policies are never mutated once published, so
+        # readers load the reference without locking and the sync thread
+        # publishes a new one with a single attribute assignment.
         self._policy: Optional[Policy] = None
-        self._policy_lock = threading.Lock()
+        # Validator of the cached policy for conditional requests; updated
+        # together with _last_sync under _sync_lock
+        self._etag: Optional[str] = None
+        self._sync_lock = threading.Lock()
+        # Resolved rules for the current policy: (policy, {(type, context): rule}).
+        # Replaced wholesale when the policy object changes, so a hit needs
+        # no lock and entries can never outlive the policy they came from.
+        self._rule_cache: Tuple[Optional[Policy], Dict[Tuple[str, str], Any]] = (None, {})
         
         # Sync state
         self._last_sync: Optional[datetime] = None
-        self._sync_thread: Optional[threading.Thread] = None
+        # Recent request round-trip times and the number of consecutive
+        # fetches that found no change; both stretch the sync interval
+        self._rtt_window: deque = deque(maxlen=3)
+        self._unchanged_streak = 0
+        self._failure_count = 0
+        self._scheduler: Optional[_SyncScheduler] = None
         self._stop_sync = threading.Event()
+        # Held by the scheduler thread for the duration of each sync
+        self._sync_running = threading.Lock()
         
-        # HTTP client
+        # HTTP client. One long-lived pooled connection is shared by the
+        # background sync and refresh(), kept alive across sync intervals so
+        # each fetch skips the TCP/TLS handshake; HTTP/2 when h2 is installed.
+        # No custom transport, so HTTP(S)_PROXY/NO_PROXY from the environment
+        # still apply.
         self._client = httpx.Client(
-            timeout=10.0,
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=8,
+                max_keepalive_connections=4,
+                keepalive_expiry=max(60.0, sync_interval * 2.0),
+            ),
             headers={
                 "X-API-Key": self.api_key,
                 "User-Agent": "SecureAI-Python-SDK/0.1.0",
@@ -102,13 +243,11 @@ class PolicyManager:
             
             # Use fallback policy if provided
             if self.fallback_policy:
-                with self._policy_lock:
-                    self._policy = self.fallback_policy
+                self._policy = self.fallback_policy
                 logger.info("Using fallback policy")
             else:
                 # Create default policy
-                with self._policy_lock:
-                    self._policy = self._create_default_policy()
+                self._policy = self._create_default_policy()
                 logger.info("Using default policy")
 
     def _create_default_policy(self) -> Policy:
@@ -153,54 +292,103 @@ class PolicyManager:
         )
 
     def _start_background_sync(self) -> None:
-        """Start background thread for policy synchronization."""
-        self._sync_thread = threading.Thread(
-            target=self._background_sync_loop, daemon=True, name="PolicySync"
-        )
-        self._sync_thread.start()
+        """Register with the shared background sync thread."""
+        # Stagger the first sync so instances started together don't align
+        delay = self._next_sync_interval() + random.uniform(0, min(5.0, self.sync_interval))
+        self._scheduler = _SyncScheduler.shared()
+        self._scheduler.schedule(self, delay)
         logger.info(f"Background policy sync started (interval: {self.sync_interval}s)")
 
-    def _background_sync_loop(self) -> None:
-        """Background loop for syncing policies."""
-        while not self._stop_sync.is_set():
-            # Wait for sync interval
-            if self._stop_sync.wait(timeout=self.sync_interval):
-                break  # Stop event was set
-            
-            try:
-                self._fetch_policy()
-            except Exception as e:
-                logger.error(f"Background policy sync failed: {e}")
-                # Continue with cached policy if offline mode enabled
+    def _sync_once(self) -> float:
+        """Run one background sync and return the delay until the next one."""
+        try:
+            self._fetch_policy()
+            self._failure_count = 0
+            return self._next_sync_interval()
+        except Exception as e:
+            self._failure_count += 1
+            delay = self._failure_backoff()
+            logger.error(f"Background policy sync failed: {e} (retrying in {delay:.0f}s)")
+            # Continue with cached policy if offline mode enabled
+            return delay
+
+    def _next_sync_interval(self) -> float:
+        """
+        Seconds until the next background sync.
+        
+        Starts at sync_interval and stretches on slow links (1x/4x/10x by
+        average round-trip time) and while the policy keeps coming back
+        unchanged (one step per 4 unchanged fetches, up to 8x). The result
+        is capped at 10x sync_interval.
+        """
+        multiplier = 1
+        if self._rtt_window:
+            avg_rtt = sum(self._rtt_window) / len(self._rtt_window)
+            if avg_rtt >= 5.0:
+                multiplier = 10
+            elif avg_rtt >= 1.0:
+                multiplier = 4
+        
+        multiplier *= min(8, 1 + self._unchanged_streak // 4)
+        return self.sync_interval * min(multiplier, 10)
+
+    def _failure_backoff(self) -> float:
+        """
+        Seconds until the next attempt after a failed sync.
+        
+        Doubles with each consecutive failure, capped at _MAX_BACKOFF (or
+        sync_interval if that is longer), plus up to 10% jitter so a fleet
+        does not retry in lockstep against a struggling server.
+        """
+        cap = max(self._MAX_BACKOFF, float(self.sync_interval))
+        delay = min(self.sync_interval * 2 ** min(self._failure_count, 16), cap)
+        return delay + random.uniform(0, self.sync_interval * 0.1)
 
     def _fetch_policy(self) -> None:
         """Fetch policy from central platform."""
         try:
             url = f"{self.base_url}/api/v1/policies"
             params = {"app_id": self.app_id}
+            headers = {}
             
-            # Include current version for conditional fetch
-            with self._policy_lock:
-                if self._policy:
-                    params["current_version"] = self._policy.version
+            # Conditional fetch: the server answers 304 with no body when the
+            # ETag still matches. Servers without ETag support get the current
+            # version instead and may answer {"status": "up_to_date"}.
+            current = self._policy
+            with self._sync_lock:
+                etag = self._etag
+            if etag:
+                headers["If-None-Match"] = etag
+            elif current:
+                params["current_version"] = current.version
             
-            response = self._client.get(url, params=params)
+            started = time.monotonic()
+            response = self._client.get(url, params=params, headers=headers)
+            self._rtt_window.append(time.monotonic() - started)
+            
+            if response.status_code == 304:
+                logger.debug("Policy not modified (304)")
+                self._unchanged_streak += 1
+                return
             response.raise_for_status()
             
-            data = response.json()
+            data = _parse_json(response.content)
             
             # Check if policy was updated
             if data.get("status") == "up_to_date":
                 logger.debug("Policy is up to date")
+                self._unchanged_streak += 1
                 return
             
             # Parse and cache new policy
-            policy = Policy(**data)
+            policy = Policy.model_validate(data)
             
-            with self._policy_lock:
-                old_version = self._policy.version if self._policy else "none"
-                self._policy = policy
+            old_version = current.version if current else "none"
+            self._policy = policy
+            with self._sync_lock:
+                self._etag = response.headers.get("ETag")
                 self._last_sync = datetime.now()
+            self._unchanged_streak = 0
             
             logger.info(f"Policy updated: {old_version} -> {policy.version}")
             
@@ -227,10 +415,10 @@ class PolicyManager:
         Raises:
             PolicyError: If no policy available
         """
-        with self._policy_lock:
-            if self._policy is None:
-                raise PolicyError("No policy available")
-            return self._policy
+        policy = self._policy
+        if policy is None:
+            raise PolicyError("No policy available")
+        return policy
 
     def get_rule(
         self, entity_type: EntityType, context: str = "all"
@@ -245,8 +433,54 @@ class PolicyManager:
         Returns:
             Matching rule or None
         """
+        key = (entity_type, context)
+        cached_policy, rules = self._rule_cache
+        if cached_policy is not None and cached_policy is self._policy:
+            try:
+                return rules[key]
+            except KeyError:
+                pass
+        
         policy = self.get_policy()
-        return policy.get_rule(entity_type, context)
+        if policy is not cached_policy:
+            rules = {}
+            self._rule_cache = (policy, rules)
+        rule = policy.get_rule(entity_type, context)
+        if len(rules) < self._RULE_CACHE_SIZE:
+            rules[key] = rule
+        return rule
+
+    def get_rules_batch(
+        self, pairs: Iterable[Tuple[EntityType, str]]
+    ) -> List[Optional[MaskingRule]]:
+        """
+        Get masking rules for several (entity_type, context) pairs at once.
+        
+        The current policy is read once for the whole batch, so every rule
+        comes from the same policy even if a sync swaps it mid-call.
+        
+        Args:
+            pairs: (entity_type, context) pairs to resolve
+        
+        Returns:
+            Matching rule or None for each pair, in input order
+        """
+        policy = self.get_policy()
+        cached_policy, rules = self._rule_cache
+        if policy is not cached_policy:
+            rules = {}
+            self._rule_cache = (policy, rules)
+        
+        results = []
+        for pair in pairs:
+            try:
+                rule = rules[pair]
+            except KeyError:
+                rule = policy.get_rule(*pair)
+                if len(rules) < self._RULE_CACHE_SIZE:
+                    rules[pair] = rule
+            results.append(rule)
+        return results
 
     def refresh(self) -> None:
         """Force immediate policy refresh from platform."""
@@ -260,26 +494,29 @@ class PolicyManager:
         Returns:
             Dictionary with sync status information
         """
-        with self._policy_lock:
-            return {
-                "has_policy": self._policy is not None,
-                "policy_version": self._policy.version if self._policy else None,
-                "last_sync": self._last_sync.isoformat() if self._last_sync else None,
-                "sync_interval": self.sync_interval,
-                "offline_mode": self.offline_mode,
-                "sync_thread_alive": self._sync_thread.is_alive()
-                if self._sync_thread
-                else False,
-            }
+        policy = self._policy
+        with self._sync_lock:
+            last_sync = self._last_sync
+        return {
+            "has_policy": policy is not None,
+            "policy_version": policy.version if policy else None,
+            "last_sync": last_sync.isoformat() if last_sync else None,
+            "sync_interval": self.sync_interval,
+            "offline_mode": self.offline_mode,
+            "sync_thread_alive": self._scheduler is not None
+            and self._scheduler.is_alive()
+            and not self._stop_sync.is_set(),
+        }
 
     def stop(self) -> None:
         """Stop background sync and cleanup."""
-        if self._sync_thread and self._sync_thread.is_alive():
+        if self._scheduler and not self._stop_sync.is_set():
             logger.info("Stopping background policy sync")
             self._stop_sync.set()
-            self._sync_thread.join(timeout=5)
         
-        self._client.close()
+        # Let a sync already running on the scheduler thread finish first
+        with self._sync_running:
+            self._client.close()
 
     def __del__(self) -> None:
         """Cleanup on deletion."""
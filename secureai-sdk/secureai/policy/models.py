@@ -1,8 +1,8 @@
 """Policy data models."""
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from secureai.detection.entities import EntityType
 from secureai.encryption.strategies import MaskingStrategy
@@ -26,6 +26,9 @@ class MaskingRule(BaseModel):
         """Pydantic config."""
 
         use_enum_values = True
+        # Rules are shared by every thread that masks; they never change
+        # after validation
+        frozen = True
 
 
 class Policy(BaseModel):
@@ -46,6 +49,35 @@ class Policy(BaseModel):
     
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
 
+    # (entity_type, context) -> winning rule, with rule precedence already
+    # resolved; built lazily and rebuilt if `rules` is replaced or resized
+    _rule_index: Optional[Dict[Tuple[str, str], MaskingRule]] = PrivateAttr(default=None)
+    _rule_index_key: Optional[Tuple[int, int]] = PrivateAttr(default=None)
+
+    def _get_rule_index(self) -> Dict[Tuple[str, str], MaskingRule]:
+        """
+        Return the rule lookup table, building it if needed.
+        
+        The first matching rule in list order wins. An "all" rule is stored
+        under (entity_type, "all") and shadows every later rule for that
+        entity type; context-specific rules listed before it keep their own
+        entries.
+        """
+        key = (id(self.rules), len(self.rules))
+        if self._rule_index is None or self._rule_index_key != key:
+            index: Dict[Tuple[str, str], MaskingRule] = {}
+            for rule in self.rules:
+                if (rule.entity_type, "all") in index:
+                    continue
+                if "all" in rule.contexts:
+                    index[(rule.entity_type, "all")] = rule
+                else:
+                    for rule_context in rule.contexts:
+                        index.setdefault((rule.entity_type, rule_context), rule)
+            self._rule_index = index
+            self._rule_index_key = key
+        return self._rule_index
+
     def get_rule(self, entity_type: EntityType, context: str = "all") -> Optional[MaskingRule]:
         """
         Get masking rule for specific entity type and context.
@@ -57,11 +89,11 @@ class Policy(BaseModel):
         Returns:
             Matching rule or None
         """
-        for rule in self.rules:
-            if rule.entity_type == entity_type:
-                if "all" in rule.contexts or context in rule.contexts:
-                    return rule
-        return None
+        index = self._get_rule_index()
+        rule = index.get((entity_type, context))
+        if rule is None:
+            rule = index.get((entity_type, "all"))
+        return rule
 
     def has_rule(self, entity_type: EntityType) -> bool:
         """Check if policy has a rule for entity type."""
@@ -71,4 +103,7 @@ class Policy(BaseModel):
         """Pydantic config."""
 
         json_encoders = {datetime: lambda v: v.isoformat()}
+        # Published policies are replaced, never edited in place, which lets
+        # PolicyManager hand them to readers without locking
+        frozen = True
 
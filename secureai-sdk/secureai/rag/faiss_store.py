@@ -4,8 +4,12 @@ FAISS Vector Store for RAG.
 Provides in-memory vector similarity search using Facebook's FAISS library.
 """
 
+import json
+import os
+import threading
+from collections import OrderedDict
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Literal, Optional, Tuple
 import logging
 
 try:
@@ -17,6 +21,24 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Types json.dump writes and json.load reads back unchanged
+_JSON_TYPES = (str, int, float, bool, type(None))
+
+
+def _non_json_paths(value: Any, path: str) -> Iterator[str]:
+    """Yield the paths of values in value that JSON cannot round-trip unchanged."""
+    if type(value) is dict:
+        for key, item in value.items():
+            item_path = f"{path}[{key!r}]"
+            if type(key) is not str:
+                yield item_path
+            yield from _non_json_paths(item, item_path)
+    elif type(value) is list:
+        for i, item in enumerate(value):
+            yield from _non_json_paths(item, f"{path}[{i}]")
+    elif type(value) not in _JSON_TYPES:
+        yield path
+
 
 class FAISSVectorStore:
     """
@@ -25,12 +47,43 @@ class FAISSVectorStore:
     Uses sentence transformers for embeddings and FAISS for fast nearest neighbor search.
     """
 
-    def __init__(self, embedding_model: str = "all-MiniLM-L6-v2", embedder: Optional[Any] = None):
+    # storage_dtype -> ScalarQuantizer type name (None stores raw float32)
+    _SCALAR_QUANTIZERS = {"fp32": None, "fp16": "QT_fp16", "int8": "QT_8bit"}
+
+    def __init__(
+        self,
+        embedding_model: str = "all-MiniLM-L6-v2",
+        embedder: Optional[Any] = None,
+        index_type: Literal["flat", "hnsw", "ivfpq"] = "flat",
+        hnsw_m: int = 32,
+        ivf_nlist: int = 100,
+        ivf_train_size: int = 10000,
+        storage_dtype: Literal["fp32", "fp16", "int8"] = "fp32",
+        encode_batch_size: int = 64,
+        query_cache_size: int = 1024,
+    ):
         """
         Initialize FAISS vector store.
         
         Args:
             embedding_model: SentenceTransformer model name
+            embedder: Optional custom embedder used instead of SentenceTransformer
+            index_type: "flat" for exact search, "hnsw" for a graph index with
+                sublinear queries, or "ivfpq" for an inverted-file index with
+                product quantization (see ivf_train_size)
+            hnsw_m: Neighbors per node for the HNSW graph
+            ivf_nlist: Number of inverted lists (clusters) for IVFPQ
+            ivf_train_size: IVFPQ keeps vectors in an exact flat index until
+                this many are stored, then trains on them and switches over.
+                Raised to the minimum IVF and PQ training need if lower.
+            storage_dtype: Vector storage for flat and HNSW indexes: "fp32"
+                (exact), "fp16" (half the memory) or "int8" (a quarter,
+                trained on the first batch of documents). IVFPQ already
+                stores compressed codes and ignores this.
+            encode_batch_size: Texts per forward pass when embedding with
+                SentenceTransformer
+            query_cache_size: Number of recent query embeddings to keep
+                (0 to disable)
         """
         if not FAISS_AVAILABLE:
             raise ImportError(
@@ -60,43 +113,284 @@ class FAISSVectorStore:
                     "Install with: pip install sentence-transformers"
                 )
         
-        # Initialize FAISS index (using L2 distance)
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
-        
-        # Store document metadata
-        self.documents: List[Dict[str, Any]] = []
-        self.doc_ids: List[str] = []
+        if index_type not in ("flat", "hnsw", "ivfpq"):
+            raise ValueError(f"Unknown FAISS index type: {index_type}")
+        if storage_dtype not in self._SCALAR_QUANTIZERS:
+            raise ValueError(f"Unknown FAISS storage dtype: {storage_dtype}")
+        self.storage_dtype = storage_dtype
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.ivf_nlist = ivf_nlist
+        # k-means needs at least one point per IVF list and per PQ centroid
+        self.ivf_train_size = max(ivf_train_size, ivf_nlist, 256)
+        self.encode_batch_size = encode_batch_size
+        self.query_cache_size = query_cache_size
+        # Query text -> prepared embedding, least recently used first.
+        # Embeddings depend only on the model, not on the stored documents.
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        
+        # Resolve the embedding call once: texts -> float32 matrix ready for
+        # the index. SentenceTransformer takes extra encode() arguments.
+        if 'SentenceTransformer' in str(self.model.__class__):
+            self._embed = self._embed_sentence_transformer
+            self._autocast_fp16 = str(getattr(self.model, "device", "cpu")).startswith("cuda")
+        else:
+            self._embed = self._embed_custom
+            self._autocast_fp16 = False
+        
+        # Initialize FAISS index (cosine similarity over normalized embeddings)
+        self.index = self._new_index()
+        
+        # Store document metadata. Vectors carry explicit int64 ids from a
+        # monotonic counter, so deleting one never renumbers the others.
+        # FAISS id -> (doc_id, document), in insertion order
+        self._entries: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        # doc_id -> FAISS id
+        self._faiss_id_by_doc: Dict[str, int] = {}
+        self._next_id = 0
+        # Set by load(mmap=True): memory-mapped IVF lists cannot be modified
+        self._read_only = False
         
         logger.info(f"Initialized FAISS store with {embedding_model}")
 
+    @property
+    def documents(self) -> List[Dict[str, Any]]:
+        """Stored documents in insertion order."""
+        return [doc for _, doc in self._entries.values()]
+
+    @property
+    def doc_ids(self) -> List[str]:
+        """Stored document IDs in insertion order."""
+        return [doc_id for doc_id, _ in self._entries.values()]
+
+    def _new_index(self) -> Any:
+        """Create an empty FAISS index of the configured type, keyed by explicit ids."""
+        if self.index_type == "ivfpq":
+            # Stage in an exact index until there is enough data to train on
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedding_dim))
+        return self._new_id_index()
+
+    def _new_id_index(self) -> Any:
+        """
+        Create the configured index, accepting explicit ids.
+        
+        IVF indexes store ids natively. Wrapping them in IndexIDMap2 would
+        break remove_ids, which assumes the inner index renumbers its
+        vectors sequentially after a removal; IVF lists do not.
+        """
+        index = self._new_base_index()
+        if self.index_type == "ivfpq":
+            return index
+        return faiss.IndexIDMap2(index)
+
+    def _new_base_index(self) -> Any:
+        """Create the underlying FAISS index of the configured type."""
+        quantizer = self._SCALAR_QUANTIZERS[self.storage_dtype]
+        qtype = getattr(faiss.ScalarQuantizer, quantizer) if quantizer else None
+        
+        if self.index_type == "hnsw":
+            if qtype is None:
+                index = faiss.IndexHNSWFlat(
+                    self.embedding_dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT
+                )
+            else:
+                index = faiss.IndexHNSWSQ(
+                    self.embedding_dim, qtype, self.hnsw_m, faiss.METRIC_INNER_PRODUCT
+                )
+            index.hnsw.efConstruction = 200
+            index.hnsw.efSearch = 64
+            return index
+        
+        if self.index_type == "ivfpq":
+            # PQ needs a sub-quantizer count that divides the dimension
+            pq_m = max(
+                m for m in range(1, max(1, self.embedding_dim // 4) + 1)
+                if self.embedding_dim % m == 0
+            )
+            # index_factory owns the coarse quantizer for us
+            index = faiss.index_factory(
+                self.embedding_dim,
+                f"IVF{self.ivf_nlist},PQ{pq_m}x8",
+                faiss.METRIC_INNER_PRODUCT,
+            )
+            faiss.extract_index_ivf(index).nprobe = min(self.ivf_nlist, 8)
+            return index
+        
+        if qtype is not None:
+            return faiss.IndexScalarQuantizer(
+                self.embedding_dim, qtype, faiss.METRIC_INNER_PRODUCT
+            )
+        return faiss.IndexFlatIP(self.embedding_dim)
+
+    def _uses_cosine(self) -> bool:
+        """Whether the index holds unit vectors scored by inner product.
+        
+        Indexes saved before cosine scoring was introduced use L2 distance
+        on raw embeddings and keep being searched that way.
+        """
+        return self.index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+    def _prepare_vectors(self, embeddings: Any) -> np.ndarray:
+        """Convert embeddings to a float32 matrix, L2-normalized for cosine indexes."""
+        if not self._uses_cosine():
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+        # Copy so that normalizing in place never touches the caller's array
+        vectors = np.array(embeddings, dtype=np.float32, order="C")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def _embed_custom(self, texts: List[str]) -> np.ndarray:
+        """Embed texts with a custom embedder (Azure, AWS, etc.)."""
+        return self._prepare_vectors(self.model.encode(texts))
+
+    def _embed_sentence_transformer(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with a SentenceTransformer model.
+        
+        Encodes in batches of encode_batch_size, returns unit vectors
+        directly for cosine indexes, and runs under fp16 autocast when the
+        model lives on a CUDA device.
+        """
+        normalize = self._uses_cosine()
+        kwargs = {
+            "batch_size": self.encode_batch_size,
+            "convert_to_numpy": True,
+            "normalize_embeddings": normalize,
+            "show_progress_bar": False,
+        }
+        if self._autocast_fp16:
+            import torch
+            
+            with torch.autocast("cuda", dtype=torch.float16):
+                embeddings = self.model.encode(texts, **kwargs)
+            # Re-normalize after the fp16 round trip
+            return self._prepare_vectors(embeddings)
+        
+        embeddings = self.model.encode(texts, **kwargs)
+        if normalize:
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+        return self._prepare_vectors(embeddings)
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries, reusing cached vectors for recently seen query strings."""
+        if self.query_cache_size <= 0:
+            return self._embed(queries)
+        
+        cache = self._query_cache
+        rows: Dict[str, np.ndarray] = {}
+        with self._query_cache_lock:
+            for query in queries:
+                vector = cache.get(query)
+                if vector is not None:
+                    cache.move_to_end(query)
+                    rows[query] = vector
+        
+        # Embed outside the lock so concurrent searches are not serialized
+        # behind the model
+        missing = [query for query in dict.fromkeys(queries) if query not in rows]
+        if missing:
+            embedded = self._embed(missing)
+            with self._query_cache_lock:
+                for query, vector in zip(missing, embedded):
+                    rows[query] = cache[query] = vector.copy()
+                while len(cache) > self.query_cache_size:
+                    cache.popitem(last=False)
+        
+        return np.vstack([rows[query] for query in queries])
+
+    def _check_writable(self) -> None:
+        """Raise if the store was memory-mapped by load(mmap=True)."""
+        if self._read_only:
+            raise RuntimeError(
+                "FAISS store was loaded with mmap=True and is read-only; "
+                "load it without mmap to modify it"
+            )
+
+    def _add_embeddings(self, embeddings: np.ndarray, ids: np.ndarray) -> None:
+        """Add prepared embeddings to the index, training it first if required."""
+        if not self.index.is_trained:
+            self.index.train(embeddings)
+        self.index.add_with_ids(embeddings, ids)
+        
+        if self._is_staging() and self.index.ntotal >= self.ivf_train_size:
+            self._train_from_staging()
+
+    def _is_staging(self) -> bool:
+        """Whether an IVFPQ store still holds its vectors in the flat staging index."""
+        return (
+            self.index_type == "ivfpq"
+            and self.index.metric_type == faiss.METRIC_INNER_PRODUCT
+            and not isinstance(faiss.downcast_index(self.index), faiss.IndexIVF)
+        )
+
+    def _train_from_staging(self) -> None:
+        """Train the IVFPQ index on the staged vectors and move them into it."""
+        ids = faiss.vector_to_array(self.index.id_map)
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        
+        index = self._new_id_index()
+        index.train(vectors)
+        index.add_with_ids(vectors, ids)
+        self.index = index
+        logger.info(f"Trained IVFPQ index on {len(ids)} vectors")
+
+    def _remove_ids(self, ids: List[int]) -> None:
+        """
+        Remove vectors from the index by id.
+        
+        Flat and IVF indexes delete in place. HNSW graphs cannot, so the
+        index is rebuilt from its own stored vectors - no re-embedding.
+        """
+        ids_array = np.asarray(ids, dtype=np.int64)
+        try:
+            self.index.remove_ids(ids_array)
+            return
+        except RuntimeError:
+            pass
+        
+        all_ids = faiss.vector_to_array(self.index.id_map)
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        keep = ~np.isin(all_ids, ids_array)
+        
+        self.index = self._new_index()
+        if keep.any():
+            self._add_embeddings(np.ascontiguousarray(vectors[keep]), all_ids[keep])
+
     def add_documents(self, documents: List[Dict[str, Any]]) -> None:
         """
         Add documents to the vector store.
         
+        Adding a document whose doc_id is already stored replaces it.
+        
         Args:
             documents: List of documents with 'text', 'doc_id', and optional 'metadata'
         """
         if not documents:
             return
+        self._check_writable()
         
         # Extract texts
         texts = [doc.get("text", "") for doc in documents]
         
-        # Generate embeddings
-        # Check if model is SentenceTransformer (has convert_to_numpy) or custom embedder
-        if hasattr(self.model, '__class__') and 'SentenceTransformer' in str(self.model.__class__):
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
-        else:
-            # Custom embedder (Azure, AWS, etc.) - already returns numpy
-            embeddings = self.model.encode(texts)
-        
-        # Add to FAISS index
-        self.index.add(embeddings.astype('float32'))
+        # Generate embeddings and add to FAISS index
+        ids = np.arange(self._next_id, self._next_id + len(documents), dtype=np.int64)
+        self._add_embeddings(self._embed(texts), ids)
+        self._next_id += len(documents)
         
         # Store metadata
-        for doc in documents:
-            self.documents.append(doc)
-            self.doc_ids.append(doc.get("doc_id", str(len(self.doc_ids))))
+        replaced = []
+        for faiss_id, doc in zip(ids.tolist(), documents):
+            doc_id = doc.get("doc_id", str(faiss_id))
+            old_id = self._faiss_id_by_doc.get(doc_id)
+            if old_id is not None:
+                del self._entries[old_id]
+                replaced.append(old_id)
+            self._faiss_id_by_doc[doc_id] = faiss_id
+            self._entries[faiss_id] = (doc_id, doc)
+        
+        if replaced:
+            self._remove_ids(replaced)
         
         logger.info(f"Added {len(documents)} documents to FAISS index")
 
@@ -117,44 +411,111 @@ class FAISSVectorStore:
         Returns:
             List of documents with scores
         """
-        if self.index.ntotal == 0:
+        return self.search_batch([query], top_k=top_k, score_threshold=score_threshold)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        score_threshold: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar documents for several queries at once.
+        
+        All queries are embedded in one encode() call and searched with a
+        single FAISS call on the stacked query matrix.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            score_threshold: Minimum similarity score (optional)
+        
+        Returns:
+            One list of documents with scores per query, in query order
+        """
+        if not queries:
             return []
         
-        # Generate query embedding
-        if hasattr(self.model, '__class__') and 'SentenceTransformer' in str(self.model.__class__):
-            query_embedding = self.model.encode([query], convert_to_numpy=True)
-        else:
-            # Custom embedder
-            query_embedding = self.model.encode([query])
+        if self.index.ntotal == 0:
+            return [[] for _ in queries]
+        
+        # Generate query embeddings
+        query_embeddings = self._embed_queries(queries)
+        
+        return self._search_prepared(query_embeddings, top_k, score_threshold)
+
+    def search_by_vector(
+        self,
+        embeddings: Any,
+        top_k: int = 5,
+        score_threshold: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search with precomputed query embeddings, skipping the embedder.
+        
+        Args:
+            embeddings: Query embedding matrix (one row per query) from the
+                same model as the stored documents
+            top_k: Number of results to return per query
+            score_threshold: Minimum similarity score (optional)
         
+        Returns:
+            One list of documents with scores per query, in row order
+        """
+        query_embeddings = self._prepare_vectors(np.atleast_2d(embeddings))
+        if self.index.ntotal == 0:
+            return [[] for _ in range(len(query_embeddings))]
+        
+        return self._search_prepared(query_embeddings, top_k, score_threshold)
+
+    def _search_prepared(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        score_threshold: Optional[float],
+    ) -> List[List[Dict[str, Any]]]:
+        """Search the index with prepared query vectors."""
         # Search FAISS index
         distances, indices = self.index.search(
-            query_embedding.astype('float32'), 
+            query_embeddings, 
             min(top_k, self.index.ntotal)
         )
         
-        # Convert to results
-        results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx == -1:  # FAISS returns -1 for invalid indices
-                continue
-            
+        if self._uses_cosine():
+            # Inner product of unit vectors is the cosine similarity; report
+            # the equivalent squared L2 distance alongside it
+            similarity_scores = distances
+            distances = 2.0 - 2.0 * similarity_scores
+        else:
             # Convert L2 distance to similarity score (inverse)
             # Lower distance = higher similarity
-            similarity_score = 1.0 / (1.0 + distance)
-            
-            # Apply threshold if specified
-            if score_threshold and similarity_score < score_threshold:
-                continue
-            
-            doc = self.documents[idx].copy()
-            doc['score'] = float(similarity_score)
-            doc['distance'] = float(distance)
-            doc['rank'] = i + 1
-            
-            results.append(doc)
+            similarity_scores = 1.0 / (1.0 + distances)
         
-        return results
+        # Convert to results
+        batch_results = []
+        for row_scores, row_distances, row_indices in zip(
+            similarity_scores.tolist(), distances.tolist(), indices.tolist()
+        ):
+            results = []
+            for i, (similarity_score, distance, idx) in enumerate(
+                zip(row_scores, row_distances, row_indices)
+            ):
+                if idx == -1:  # FAISS returns -1 for invalid indices
+                    continue
+                
+                # Apply threshold if specified
+                if score_threshold and similarity_score < score_threshold:
+                    continue
+                
+                doc = self._entries[idx][1].copy()
+                doc['score'] = similarity_score
+                doc['distance'] = distance
+                doc['rank'] = i + 1
+                
+                results.append(doc)
+            batch_results.append(results)
+        
+        return batch_results
 
     def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -166,50 +527,47 @@ class FAISSVectorStore:
         Returns:
             Document or None if not found
         """
-        try:
-            idx = self.doc_ids.index(doc_id)
-            return self.documents[idx]
-        except ValueError:
+        faiss_id = self._faiss_id_by_doc.get(doc_id)
+        if faiss_id is None:
             return None
+        return self._entries[faiss_id][1]
 
     def delete_document(self, doc_id: str) -> bool:
         """
         Delete document by ID.
         
-        Note: FAISS doesn't support deletion efficiently.
-        This rebuilds the entire index.
-        
         Args:
             doc_id: Document ID
         
         Returns:
             True if deleted, False if not found
         """
-        try:
-            idx = self.doc_ids.index(doc_id)
-        except ValueError:
+        self._check_writable()
+        faiss_id = self._faiss_id_by_doc.pop(doc_id, None)
+        if faiss_id is None:
             return False
         
         # Remove from metadata
-        del self.documents[idx]
-        del self.doc_ids[idx]
-        
-        # Rebuild index
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
+        del self._entries[faiss_id]
         
-        if self.documents:
-            texts = [doc.get("text", "") for doc in self.documents]
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
-            self.index.add(embeddings.astype('float32'))
+        # Remove from index
+        self._remove_ids([faiss_id])
         
-        logger.info(f"Deleted document {doc_id} and rebuilt index")
+        logger.info(f"Deleted document {doc_id}")
         return True
 
     def clear(self) -> None:
         """Clear all documents from the store."""
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
-        self.documents = []
-        self.doc_ids = []
+        self.index = self._new_index()
+        self._entries = {}
+        self._faiss_id_by_doc = {}
+        self._next_id = 0
+        self._read_only = False
+        
+        # A loaded legacy index may have used another metric, so cached
+        # query vectors can be prepared for the wrong one
+        with self._query_cache_lock:
+            self._query_cache.clear()
         logger.info("Cleared FAISS index")
 
     def count(self) -> int:
@@ -220,43 +578,124 @@ class FAISSVectorStore:
         """
         Save index to disk.
         
+        Metadata is written as JSON. Values JSON cannot represent exactly
+        (e.g. datetimes, sets, tuples, numpy scalars) load back with a
+        different type, usually str, and a warning names each of them.
+        Both files are written to a temporary name and renamed into place,
+        so a store memory-mapped from the same path keeps reading the old
+        files.
+        
         Args:
             path: Path to save index
         """
-        import pickle
-        
         # Save FAISS index
-        faiss.write_index(self.index, f"{path}.faiss")
+        faiss.write_index(self.index, f"{path}.faiss.tmp")
+        os.replace(f"{path}.faiss.tmp", f"{path}.faiss")
         
         # Save metadata
-        with open(f"{path}.meta", 'wb') as f:
-            pickle.dump({
+        changed = [
+            item_path
+            for doc_id, doc in self._entries.values()
+            for item_path in _non_json_paths(doc, repr(doc_id))
+        ]
+        if changed:
+            logger.warning(
+                f"Saving {len(changed)} metadata value(s) JSON cannot represent; "
+                f"they will load back with a different type: {', '.join(changed[:10])}"
+                + (", ..." if len(changed) > 10 else "")
+            )
+        with open(f"{path}.meta.tmp", 'w', encoding='utf-8') as f:
+            json.dump({
                 'documents': self.documents,
                 'doc_ids': self.doc_ids,
+                'faiss_ids': list(self._entries),
                 'embedding_model': getattr(getattr(self.model, "_model_card_data", None), "model_id", None) or getattr(self, "_embedding_model_name", "unknown"),
                 'embedding_dim': self.embedding_dim,
-            }, f)
+            }, f, default=str)
+        os.replace(f"{path}.meta.tmp", f"{path}.meta")
         
         logger.info(f"Saved FAISS index to {path}")
 
-    def load(self, path: str) -> None:
+    def load(self, path: str, mmap: bool = False, allow_pickle: bool = False) -> None:
         """
         Load index from disk.
         
         Args:
             path: Path to load index from
+            mmap: Memory-map the index file instead of reading it into RAM.
+                Opening is near-instant and pages are loaded on first touch;
+                the file must not be modified in place while mapped. The
+                store is read-only afterwards: add_documents and
+                delete_document raise RuntimeError until clear() or a
+                load without mmap.
+            allow_pickle: Accept metadata in the legacy pickle format.
+                Unpickling can run arbitrary code, so only enable this for
+                files from a trusted source; re-saving writes JSON.
+        
+        Raises:
+            ValueError: If the metadata is legacy pickle and allow_pickle is False
         """
-        import pickle
-        
         # Load FAISS index
-        self.index = faiss.read_index(f"{path}.faiss")
+        if mmap:
+            index = faiss.read_index(
+                f"{path}.faiss", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            )
+        else:
+            index = faiss.read_index(f"{path}.faiss")
         
         # Load metadata
         with open(f"{path}.meta", 'rb') as f:
-            data = pickle.load(f)
-            self.documents = data['documents']
-            self.doc_ids = data['doc_ids']
-            self.embedding_dim = data['embedding_dim']
+            content = f.read()
+        if content[:1] == b"{":
+            data = json.loads(content)
+        else:
+            # Stores saved before the JSON format used pickle
+            if not allow_pickle:
+                raise ValueError(
+                    f"{path}.meta uses the legacy pickle format; pass "
+                    "allow_pickle=True to load it if the file is trusted"
+                )
+            import pickle
+            
+            logger.warning(f"Loading legacy pickle metadata from {path}.meta")
+            data = pickle.loads(content)
+        self.embedding_dim = data['embedding_dim']
+        
+        # Indexes saved before explicit ids used row positions; re-key them
+        # so the row number becomes the id
+        if 'faiss_ids' not in data:
+            vectors = index.reconstruct_n(0, index.ntotal)
+            self.index = faiss.IndexIDMap2(faiss.IndexFlat(index.d, index.metric_type))
+            if index.ntotal:
+                self.index.add_with_ids(vectors, np.arange(index.ntotal, dtype=np.int64))
+            faiss_ids = list(range(index.ntotal))
+        else:
+            self.index = index
+            faiss_ids = data['faiss_ids']
+        
+        self._entries = {}
+        self._faiss_id_by_doc = {}
+        for faiss_id, doc_id, doc in zip(faiss_ids, data['doc_ids'], data['documents']):
+            self._entries[faiss_id] = (doc_id, doc)
+            self._faiss_id_by_doc[doc_id] = faiss_id
+        self._next_id = max(faiss_ids, default=-1) + 1
+        
+        # Older stores could hold several documents under one doc_id; keep
+        # the last one, as add_documents would have
+        shadowed = [
+            faiss_id for faiss_id, (doc_id, _) in self._entries.items()
+            if self._faiss_id_by_doc[doc_id] != faiss_id
+        ]
+        if shadowed:
+            for faiss_id in shadowed:
+                del self._entries[faiss_id]
+            self._remove_ids(shadowed)
+        self._read_only = mmap
+        
+        # The loaded index may use a different metric, which changes how
+        # query vectors are prepared
+        with self._query_cache_lock:
+            self._query_cache.clear()
         
         logger.info(f"Loaded FAISS index from {path}")
 
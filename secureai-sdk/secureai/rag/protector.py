@@ -7,16 +7,22 @@ Provides secure Retrieval-Augmented Generation by:
 3. Decrypting results for authorized users
 """
 
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+import heapq
+import itertools
 import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
 
 from secureai.rag.vector_db import VectorDBType
 from secureai.detection.pii_detector import PIIDetector
-from secureai.detection.entities import PIIEntity
+from secureai.detection.entities import DetectionResult, PIIEntity
 from secureai.encryption.fpe import FPEEncryptor
 from secureai.llm.secure_llm import SecureLLM
 from secureai.policy.manager import PolicyManager
 from secureai.core.exceptions import SecureAIError
+from secureai.core.substitution import compile_replacements
 
 try:
     from secureai.rag.faiss_store import FAISSVectorStore
@@ -36,6 +42,7 @@ class Document:
         text: str,
         doc_id: str,
         metadata: Optional[Dict[str, Any]] = None,
+        encrypted_tokens: Optional[Tuple[str, ...]] = None,
     ):
         """
         Initialize document.
@@ -44,10 +51,13 @@ class Document:
             text: Document text content
             doc_id: Unique document identifier
             metadata: Optional metadata
+            encrypted_tokens: Encrypted values substituted into text by
+                protection, or None if unknown
         """
         self.text = text
         self.doc_id = doc_id
         self.metadata = metadata or {}
+        self.encrypted_tokens = encrypted_tokens
 
 
 class RAGProtector:
@@ -76,6 +86,9 @@ class RAGProtector:
         >>> result = rag.query("What is John Smith's condition?")
     """
 
+    # Documents detected and indexed per batch in protect_and_index
+    _INDEX_BATCH_SIZE = 64
+
     def __init__(
         self,
         detector: Optional[PIIDetector] = None,
@@ -83,6 +96,8 @@ class RAGProtector:
         policy_manager: Optional[PolicyManager] = None,
         llm: Optional[SecureLLM] = None,
         embedder: Optional[Any] = None,
+        faiss_options: Optional[Dict[str, Any]] = None,
+        max_entity_map_size: Optional[int] = None,
     ):
         """
         Initialize RAG protector.
@@ -92,18 +107,47 @@ class RAGProtector:
             encryptor: FPE encryptor (creates new if not provided)
             policy_manager: Policy manager for rules
             llm: Secure LLM client for generation
+            embedder: Custom embedder for FAISS indexes
+            faiss_options: Extra FAISSVectorStore arguments for new FAISS
+                indexes, e.g. {"index_type": "ivfpq"} for large corpora
+            max_entity_map_size: Keep at most this many encrypted -> original
+                mappings, dropping the least recently used. Results holding
+                a dropped value come back encrypted. None keeps all of them.
         """
         self.detector = detector or PIIDetector(min_confidence=0.5)
         self.encryptor = encryptor or FPEEncryptor(key="rag-key")
         self.policy_manager = policy_manager
         self.llm = llm
         self.embedder = embedder
+        self.faiss_options = dict(faiss_options or {})
+        self.max_entity_map_size = max_entity_map_size
         
         # Entity mappings (encrypted -> original)
         self._entity_map: Dict[str, str] = {}
+        # Bumped whenever _entity_map changes, so the compiled restore
+        # function below is rebuilt only when needed
+        self._entity_map_version = 0
+        self._restorer: Optional[Callable[[str], str]] = None
+        self._restorer_key: Optional[Tuple[int, int, int]] = None
+        # (index_name, doc_id) -> encrypted tokens in the stored text, so
+        # results are restored using only the tokens they can contain
+        self._doc_tokens: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        # (index_name, doc_id) -> (token mapping, compiled replacer) for that
+        # document, so repeated hits do not recompile the same replacer
+        self._doc_restorers: Dict[
+            Tuple[str, str], Tuple[Dict[str, str], Callable[[str], str]]
+        ] = {}
         
         # Vector stores
-        self._vector_store: Dict[str, Dict[str, Any]] = {}  # In-memory store
+        # In-memory store: index_name -> doc_id -> stored document
+        self._vector_store: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        # Keyword index over the in-memory store, per index_name: lowercased
+        # word -> doc ids, the words of each stored document, and each doc
+        # id's insertion sequence (ties in search keep insertion order)
+        self._inverted: Dict[str, Dict[str, Set[str]]] = defaultdict(dict)
+        self._doc_words: Dict[str, Dict[str, frozenset]] = defaultdict(dict)
+        self._doc_seq: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._seq_counter = itertools.count()
         self._faiss_stores: Dict[str, FAISSVectorStore] = {}  # FAISS stores by index
 
     def protect_and_index(
@@ -111,6 +155,7 @@ class RAGProtector:
         documents: List[Dict[str, Any]],
         vector_db: VectorDBType | str = VectorDBType.MEMORY,
         index_name: str = "default",
+        workers: Optional[int] = None,
     ) -> List[Document]:
         """
         Protect documents and index them in vector database.
@@ -119,6 +164,9 @@ class RAGProtector:
             documents: List of documents to index
             vector_db: Vector database type
             index_name: Name of the index
+            workers: Number of processes to run PII detection in. Detection
+                is CPU-bound Python, so threads would not help; encryption
+                and indexing stay in this process. None or 1 runs serially.
         
         Returns:
             List of protected documents
@@ -130,55 +178,124 @@ class RAGProtector:
             ... ]
             >>> protected = rag.protect_and_index(docs)
         """
+        protected_docs = list(
+            self.protect_and_index_stream(documents, vector_db, index_name, workers)
+        )
+        logger.info(f"Protected and indexed {len(protected_docs)} documents")
+        return protected_docs
+
+    def protect_and_index_stream(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        vector_db: VectorDBType | str = VectorDBType.MEMORY,
+        index_name: str = "default",
+        workers: Optional[int] = None,
+    ) -> Iterator[Document]:
+        """
+        Protect and index documents lazily, yielding each once it is indexed.
+        
+        Only one batch of documents is held at a time, so large corpora
+        can be ingested from a generator without keeping every document in
+        memory. With workers > 1 the input is read up front to distribute
+        detection.
+        
+        Args:
+            documents: Documents to index
+            vector_db: Vector database type
+            index_name: Name of the index
+            workers: Number of processes to run PII detection in
+        
+        Yields:
+            Protected documents, in input order
+        """
         try:
-            protected_docs = []
+            db_type = VectorDBType(vector_db)
+            
+            # Detect and index in batches so the detector and the embedder
+            # each run once per batch rather than once per document
+            batches = self._document_batches(documents)
+            for batch, detections in self._detect_batches(batches, workers or 1):
+                protected_batch = [
+                    self._protect_document(doc, detection)
+                    for doc, detection in zip(batch, detections)
+                ]
+                self._index_documents(protected_batch, db_type, index_name)
+                yield from protected_batch
             
-            for doc_dict in documents:
-                # Create document object
-                doc = Document(
+        except Exception as e:
+            raise SecureAIError(f"Failed to protect and index documents: {e}") from e
+
+    def _document_batches(
+        self, documents: Iterable[Dict[str, Any]]
+    ) -> Iterator[List[Document]]:
+        """Build Document objects in batches of _INDEX_BATCH_SIZE."""
+        remaining = iter(documents)
+        while True:
+            batch = [
+                Document(
                     text=doc_dict.get("text", ""),
                     doc_id=doc_dict.get("id", doc_dict.get("doc_id", "")),
                     metadata=doc_dict.get("metadata", {}),
                 )
-                
-                # Protect the document
-                protected_doc = self._protect_document(doc)
-                protected_docs.append(protected_doc)
-                
-                # Index in vector store
-                self._index_document(protected_doc, vector_db, index_name)
-            
-            logger.info(f"Protected and indexed {len(protected_docs)} documents")
-            return protected_docs
-            
-        except Exception as e:
-            raise SecureAIError(f"Failed to protect and index documents: {e}") from e
+                for doc_dict in itertools.islice(remaining, self._INDEX_BATCH_SIZE)
+            ]
+            if not batch:
+                return
+            yield batch
 
-    def _protect_document(self, document: Document) -> Document:
+    def _detect_batches(
+        self, batches: Iterable[List[Document]], workers: int
+    ) -> Iterator[Tuple[List[Document], List[DetectionResult]]]:
+        """Pair each batch with its detection results, in batch order."""
+        if workers <= 1:
+            for batch in batches:
+                yield batch, self.detector.detect_batch([doc.text for doc in batch])
+            return
+        
+        batches = list(batches)
+        texts = [[doc.text for doc in batch] for batch in batches]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from zip(batches, pool.map(self.detector.detect_batch, texts))
+
+    def _protect_document(
+        self,
+        document: Document,
+        detection_result: Optional[DetectionResult] = None,
+    ) -> Document:
         """
         Protect PII in document using FPE.
         
         Args:
             document: Original document
+            detection_result: Detection already run on document.text, if any
         
         Returns:
             Protected document with PII encrypted
         """
         # Detect PII in document
-        detection_result = self.detector.detect(document.text)
+        if detection_result is None:
+            detection_result = self.detector.detect(document.text)
         
         if detection_result.entity_count == 0:
-            # No PII found, return as-is
-            return document
+            # No PII found, keep the text as-is
+            return Document(
+                text=document.text,
+                doc_id=document.doc_id,
+                metadata=document.metadata,
+                encrypted_tokens=(),
+            )
         
         # Protect each entity
-        protected_text = self._protect_text(document.text, detection_result.entities)
+        protected_text, tokens = self._protect_text_with_tokens(
+            document.text, detection_result.entities
+        )
         
         # Create protected document
         protected_doc = Document(
             text=protected_text,
             doc_id=document.doc_id,
             metadata=document.metadata,
+            encrypted_tokens=tokens,
         )
         
         return protected_doc
@@ -194,31 +311,70 @@ class RAGProtector:
         Returns:
             Protected text
         """
-        protected = text
+        return self._protect_text_with_tokens(text, entities)[0]
+
+    def _protect_text_with_tokens(
+        self, text: str, entities: List[PIIEntity]
+    ) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Protect text by encrypting detected PII.
         
-        # Sort entities by position (reverse) to maintain positions
-        sorted_entities = sorted(entities, key=lambda e: e.start, reverse=True)
+        Args:
+            text: Original text
+            entities: Detected PII entities
         
-        for entity in sorted_entities:
+        Returns:
+            Protected text and the distinct encrypted values substituted in
+        """
+        parts = []
+        cursor = 0
+        tokens: Dict[str, None] = {}
+        
+        # Walk entities in position order, copying the text between them once
+        for entity in sorted(entities, key=attrgetter("start")):
+            if entity.start < cursor:
+                continue  # Overlaps an entity that was already encrypted
+            
             # Encrypt using FPE (deterministic)
             encrypted_value = self.encryptor.encrypt(
                 entity.value, str(entity.entity_type)
             )
             
             # Store mapping for decryption
-            self._entity_map[encrypted_value] = entity.value
+            self._remember(encrypted_value, entity.value)
+            tokens[encrypted_value] = None
             
-            # Replace in text
-            protected = (
-                protected[: entity.start] + encrypted_value + protected[entity.end :]
-            )
+            parts.append(text[cursor : entity.start])
+            parts.append(encrypted_value)
+            cursor = entity.end
         
-        return protected
+        parts.append(text[cursor:])
+        return "".join(parts), tuple(tokens)
+
+    def _remember(self, encrypted_value: str, original: str) -> None:
+        """Record an encrypted -> original mapping, evicting if the map is bounded."""
+        entity_map = self._entity_map
+        limit = self.max_entity_map_size
+        
+        if limit is None:
+            if entity_map.get(encrypted_value) != original:
+                entity_map[encrypted_value] = original
+                self._entity_map_version += 1
+            return
+        
+        # Re-insert so the dict's order runs from least to most recently used
+        previous = entity_map.pop(encrypted_value, None)
+        entity_map[encrypted_value] = original
+        if previous != original:
+            self._entity_map_version += 1
+        while len(entity_map) > limit:
+            del entity_map[next(iter(entity_map))]
+            self._entity_map_version += 1
 
     def _index_document(
         self,
         document: Document,
-        vector_db: VectorDBType | str,
+        db_type: VectorDBType,
         index_name: str,
     ) -> None:
         """
@@ -226,16 +382,37 @@ class RAGProtector:
         
         Supports MEMORY and FAISS backends.
         """
-        db_type = VectorDBType(vector_db) if isinstance(vector_db, str) else vector_db
+        self._index_documents([document], db_type, index_name)
+
+    def _index_documents(
+        self,
+        documents: List[Document],
+        db_type: VectorDBType,
+        index_name: str,
+    ) -> None:
+        """
+        Index a batch of documents in vector database.
+        
+        FAISS documents are embedded with a single add_documents() call.
+        """
+        for document in documents:
+            key = (index_name, document.doc_id)
+            self._doc_restorers.pop(key, None)
+            if document.encrypted_tokens is not None:
+                self._doc_tokens[key] = document.encrypted_tokens
+            else:
+                self._doc_tokens.pop(key, None)
         
         if db_type == VectorDBType.MEMORY:
             # Store in memory
-            key = f"{index_name}:{document.doc_id}"
-            self._vector_store[key] = {
-                "text": document.text,
-                "doc_id": document.doc_id,
-                "metadata": document.metadata,
-            }
+            store = self._vector_store[index_name]
+            for document in documents:
+                store[document.doc_id] = {
+                    "text": document.text,
+                    "doc_id": document.doc_id,
+                    "metadata": document.metadata,
+                }
+                self._index_words(index_name, document.doc_id, document.text)
         elif db_type == VectorDBType.FAISS:
             # Use FAISS for similarity search
             if not FAISS_AVAILABLE:
@@ -246,17 +423,22 @@ class RAGProtector:
             
             # Get or create FAISS store for this index
             if index_name not in self._faiss_stores:
-                self._faiss_stores[index_name] = FAISSVectorStore(embedder=self.embedder)
+                self._faiss_stores[index_name] = FAISSVectorStore(
+                    embedder=self.embedder, **self.faiss_options
+                )
             
-            # Add document to FAISS
-            self._faiss_stores[index_name].add_documents([{
-                "text": document.text,
-                "doc_id": document.doc_id,
-                "metadata": document.metadata,
-            }])
+            # Add documents to FAISS
+            self._faiss_stores[index_name].add_documents([
+                {
+                    "text": document.text,
+                    "doc_id": document.doc_id,
+                    "metadata": document.metadata,
+                }
+                for document in documents
+            ])
         else:
             # Stub for other vector DBs
-            logger.info(f"Would index in {db_type} (not implemented)")
+            logger.info(f"Would index {len(documents)} documents in {db_type} (not implemented)")
 
     def query(
         self,
@@ -286,21 +468,28 @@ class RAGProtector:
             >>> print(result["documents"])
         """
         try:
-            # Step 1: Detect PII in query
-            query_entities = self.detector.detect(query)
+            db_type = VectorDBType(vector_db)
+            
+            # Step 1: Detect PII in query. Most queries hold none, which the
+            # detector's prescan rules out without running its patterns
+            # (detectors with their own detect() always report True).
+            if self.detector.might_contain_pii(query):
+                query_entities = self.detector.detect(query).entities
+            else:
+                query_entities = []
             
             # Step 2: Protect query (encrypt PII)
-            if query_entities.entity_count > 0:
-                protected_query = self._protect_text(query, query_entities.entities)
+            if query_entities:
+                protected_query = self._protect_text(query, query_entities)
             else:
                 protected_query = query
             
             # Step 3: Search vector database
-            results = self._search(protected_query, vector_db, index_name, top_k)
+            results = self._search(protected_query, db_type, index_name, top_k)
             
             # Step 4: Decrypt results if authorized
             if auto_decrypt:
-                results = self._decrypt_results(results)
+                results = self._decrypt_results(results, index_name)
             
             # Step 5: Generate LLM response if requested
             llm_response = None
@@ -323,7 +512,7 @@ class RAGProtector:
     def _search(
         self,
         query: str,
-        vector_db: VectorDBType | str,
+        db_type: VectorDBType,
         index_name: str,
         top_k: int,
     ) -> List[Dict[str, Any]]:
@@ -332,30 +521,29 @@ class RAGProtector:
         
         Supports MEMORY (keyword matching) and FAISS (vector similarity).
         """
-        db_type = VectorDBType(vector_db) if isinstance(vector_db, str) else vector_db
-        
         if db_type == VectorDBType.MEMORY:
-            # Simple keyword matching for testing
-            results = []
-            query_lower = query.lower()
+            # Simple keyword matching: a document scores one point per query
+            # word occurring anywhere in its lowercased text
+            store = self._vector_store.get(index_name)
+            if not store:
+                return []
+            
+            scores: Dict[str, int] = {}
+            query_words: Dict[str, int] = {}
+            for word in query.lower().split():
+                query_words[word] = query_words.get(word, 0) + 1
             
-            for key, doc in self._vector_store.items():
-                if index_name in key:
-                    # Simple relevance score based on keyword matching
-                    text_lower = doc["text"].lower()
-                    score = sum(
-                        1 for word in query_lower.split() if word in text_lower
-                    )
-                    
-                    if score > 0:
-                        results.append({
-                            **doc,
-                            "score": score,
-                        })
+            for word, occurrences in query_words.items():
+                for doc_id in self._doc_ids_containing(index_name, word):
+                    scores[doc_id] = scores.get(doc_id, 0) + occurrences
             
-            # Sort by score and return top_k
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results[:top_k]
+            # Highest score first, insertion order among equal scores. Only
+            # the top_k survivors are ordered and materialized.
+            doc_seq = self._doc_seq[index_name]
+            top_ids = heapq.nlargest(
+                top_k, scores, key=lambda doc_id: (scores[doc_id], -doc_seq[doc_id])
+            )
+            return [{**store[doc_id], "score": scores[doc_id]} for doc_id in top_ids]
         
         elif db_type == VectorDBType.FAISS:
             # Use FAISS for vector similarity search
@@ -369,24 +557,76 @@ class RAGProtector:
             # Stub for other vector DBs
             return []
 
-    def _decrypt_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _index_words(self, index_name: str, doc_id: str, text: str) -> None:
+        """Add (or replace) a stored document in the keyword index."""
+        self._unindex_words(index_name, doc_id)
+        inverted = self._inverted[index_name]
+        words = frozenset(text.lower().split())
+        self._doc_words[index_name][doc_id] = words
+        for word in words:
+            inverted.setdefault(word, set()).add(doc_id)
+        doc_seq = self._doc_seq[index_name]
+        if doc_id not in doc_seq:
+            doc_seq[doc_id] = next(self._seq_counter)
+
+    def _unindex_words(self, index_name: str, doc_id: str) -> None:
+        """Remove a stored document from the keyword index."""
+        inverted = self._inverted[index_name]
+        for word in self._doc_words[index_name].pop(doc_id, ()):
+            doc_ids = inverted[word]
+            doc_ids.discard(doc_id)
+            if not doc_ids:
+                del inverted[word]
+
+    def _doc_ids_containing(self, index_name: str, word: str) -> Set[str]:
+        """
+        Ids of documents in index_name whose lowercased text contains word.
+        
+        word has no whitespace, so any occurrence lies inside a single
+        whitespace-separated word of the text; only the vocabulary needs
+        scanning, not the documents.
+        """
+        inverted = self._inverted.get(index_name, {})
+        doc_ids = set(inverted.get(word, ()))
+        for indexed_word, word_doc_ids in inverted.items():
+            if word in indexed_word and indexed_word != word:
+                doc_ids |= word_doc_ids
+        return doc_ids
+
+    def _decrypt_results(
+        self, results: List[Dict[str, Any]], index_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         Decrypt PII in search results.
         
+        Results indexed by protect_and_index are restored using only the
+        encrypted tokens recorded for their document; anything else is
+        checked against the whole entity map.
+        
         Args:
             results: Search results with encrypted PII
+            index_name: Index the results came from
         
         Returns:
             Results with PII decrypted
         """
+        if not self._entity_map:
+            # Nothing was encrypted (or the map was cleared): nothing to restore
+            return results
+        
         decrypted_results = []
         
         for result in results:
-            decrypted_text = result["text"]
-            
-            # Replace encrypted values with originals
-            for encrypted, original in self._entity_map.items():
-                decrypted_text = decrypted_text.replace(encrypted, original)
+            key = (index_name, result.get("doc_id"))
+            tokens = self._doc_tokens.get(key)
+            if tokens is None:
+                # Replace encrypted values with originals in one pass
+                decrypted_text = self._get_restorer()(result["text"])
+            elif not tokens:
+                # Indexed without any PII: nothing to restore
+                decrypted_text = result["text"]
+            else:
+                decrypted_text = self._get_doc_restorer(key, tokens)(result["text"])
             
             decrypted_result = {
                 **result,
@@ -396,6 +636,30 @@ class RAGProtector:
         
         return decrypted_results
 
+    def _get_restorer(self) -> Callable[[str], str]:
+        """Return the compiled encrypted -> original replacer for _entity_map."""
+        # The map identity is part of the key in case it was reassigned
+        key = (id(self._entity_map), len(self._entity_map), self._entity_map_version)
+        if self._restorer is None or self._restorer_key != key:
+            self._restorer = compile_replacements(self._entity_map)
+            self._restorer_key = key
+        return self._restorer
+
+    def _get_doc_restorer(
+        self, key: Tuple[str, str], tokens: Tuple[str, ...]
+    ) -> Callable[[str], str]:
+        """Return the compiled replacer for one document's encrypted tokens."""
+        entity_map = self._entity_map
+        mapping = {token: entity_map[token] for token in tokens if token in entity_map}
+        cached = self._doc_restorers.get(key)
+        # Rebuild only if the document's part of the map changed, e.g. after
+        # entries were evicted from a bounded map
+        if cached is not None and cached[0] == mapping:
+            return cached[1]
+        restorer = compile_replacements(mapping)
+        self._doc_restorers[key] = (mapping, restorer)
+        return restorer
+
     def get_entity_map(self) -> Dict[str, str]:
         """Get current entity mapping (for debugging)."""
         return self._entity_map.copy()
@@ -403,6 +667,8 @@ class RAGProtector:
     def clear_entity_map(self) -> None:
         """Clear entity mapping."""
         self._entity_map.clear()
+        self._entity_map_version += 1
+        self._doc_restorers.clear()
 
     def get_indexed_count(self, index_name: str = "default") -> int:
         """
@@ -414,8 +680,7 @@ class RAGProtector:
         Returns:
             Number of documents in index
         """
-        count = sum(1 for key in self._vector_store.keys() if index_name in key)
-        return count
+        return len(self._vector_store.get(index_name, {}))
 
     def clear_index(self, index_name: str = "default") -> None:
         """
@@ -424,7 +689,11 @@ class RAGProtector:
         Args:
             index_name: Index to clear
         """
-        keys_to_remove = [key for key in self._vector_store.keys() if index_name in key]
-        for key in keys_to_remove:
-            del self._vector_store[key]
+        self._vector_store.pop(index_name, None)
+        self._inverted.pop(index_name, None)
+        self._doc_words.pop(index_name, None)
+        self._doc_seq.pop(index_name, None)
+        for key in [key for key in self._doc_tokens if key[0] == index_name]:
+            del self._doc_tokens[key]
+            self._doc_restorers.pop(key, None)
 
@@ -111,6 +111,18 @@ class TestDataMasker:
         
         assert hash1 != hash2
 
+    def test_hash_output_is_stable(self, masker: DataMasker) -> None:
+        """Test that hashes match stored SHA-256 values and are prefixes of longer ones."""
+        assert masker.mask("123456789", MaskingStrategy.HASH) == "15e2b0d3c33891eb"
+        assert masker._hash("123456789", 40).startswith("15e2b0d3c33891eb")
+
+        blake = DataMasker(hash_algorithm="blake2b")
+        assert blake.mask("123456789", MaskingStrategy.HASH) == "16e0bf1f85594a11"
+        assert blake._hash("123456789", 40).startswith("16e0bf1f85594a11")
+
+        with pytest.raises(ValueError):
+            DataMasker(hash_algorithm="md5")
+
     def test_redact_masking(self, masker: DataMasker) -> None:
         """Test redaction."""
         value = "123-45-6789"
@@ -0,0 +1,273 @@
+"""Unit tests for FAISS vector store."""
+
+import hashlib
+import logging
+import pickle
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from secureai.rag.faiss_store import FAISSVectorStore
+
+
+class HashEmbedder:
+    """Deterministic embedder: each text maps to a fixed random vector."""
+
+    embedding_dim = 32
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        rows = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+            rows.append(np.random.default_rng(seed).standard_normal(self.embedding_dim))
+        return np.asarray(rows, dtype=np.float32)
+
+
+STORE_CONFIGS = [
+    pytest.param({"index_type": "flat"}, id="flat"),
+    pytest.param({"index_type": "flat", "storage_dtype": "fp16"}, id="flat-fp16"),
+    pytest.param({"index_type": "flat", "storage_dtype": "int8"}, id="flat-int8"),
+    pytest.param({"index_type": "hnsw"}, id="hnsw"),
+    pytest.param({"index_type": "ivfpq", "ivf_nlist": 4}, id="ivfpq-staging"),
+    pytest.param(
+        {"index_type": "ivfpq", "ivf_nlist": 4, "ivf_train_size": 256}, id="ivfpq-trained"
+    ),
+]
+
+
+def make_documents(count: int) -> List[dict]:
+    """Create documents doc0..doc{count-1}."""
+    return [
+        {"text": f"document number {i}", "doc_id": f"doc{i}", "metadata": {"n": i}}
+        for i in range(count)
+    ]
+
+
+def write_legacy_store(tmp_path: Path, documents: List[dict]) -> str:
+    """Write documents as an L2 index with pickled metadata, as older releases did."""
+    path = str(tmp_path / "legacy")
+    index = faiss.IndexFlatL2(HashEmbedder.embedding_dim)
+    index.add(HashEmbedder().encode([doc["text"] for doc in documents]))
+    faiss.write_index(index, f"{path}.faiss")
+    with open(f"{path}.meta", "wb") as f:
+        pickle.dump({
+            "documents": documents,
+            "doc_ids": [doc["doc_id"] for doc in documents],
+            "embedding_model": "custom",
+            "embedding_dim": HashEmbedder.embedding_dim,
+        }, f)
+    return path
+
+
+class TestFAISSVectorStore:
+    """Test suite for FAISSVectorStore."""
+
+    @pytest.fixture(params=STORE_CONFIGS)
+    def store(self, request: pytest.FixtureRequest) -> FAISSVectorStore:
+        """Create a store of each index type holding 300 documents."""
+        store = FAISSVectorStore(embedder=HashEmbedder(), **request.param)
+        store.add_documents(make_documents(300))
+        return store
+
+    def test_invalid_options(self) -> None:
+        """Test that unknown index types and dtypes are rejected."""
+        with pytest.raises(ValueError):
+            FAISSVectorStore(embedder=HashEmbedder(), index_type="lsh")
+        with pytest.raises(ValueError):
+            FAISSVectorStore(embedder=HashEmbedder(), storage_dtype="fp8")
+
+    def test_round_trip(self, store: FAISSVectorStore) -> None:
+        """Test that a document's own text finds it first."""
+        assert store.count() == 300
+        assert store.doc_ids[:2] == ["doc0", "doc1"]
+
+        for i in (0, 150, 299):
+            results = store.search(f"document number {i}", top_k=3)
+            assert results[0]["doc_id"] == f"doc{i}"
+            assert results[0]["metadata"] == {"n": i}
+            assert results[0]["rank"] == 1
+
+    def test_ivfpq_trains_after_staging(self) -> None:
+        """Test that IVFPQ stays exact until ivf_train_size, then switches."""
+        store = FAISSVectorStore(
+            embedder=HashEmbedder(), index_type="ivfpq", ivf_nlist=4, ivf_train_size=256
+        )
+        store.add_documents(make_documents(100))
+        assert store._is_staging()
+
+        store.add_documents(make_documents(300)[100:])
+        assert not store._is_staging()
+        assert store.count() == 300
+
+    def test_delete_and_re_add(self, store: FAISSVectorStore) -> None:
+        """Test delete by doc_id and re-adding under the same doc_id."""
+        assert store.delete_document("doc5") is True
+        assert store.delete_document("doc5") is False
+        assert store.get_document("doc5") is None
+        assert store.count() == 299
+        assert all(r["doc_id"] != "doc5" for r in store.search("document number 5", top_k=10))
+
+        store.add_documents([{"text": "document number 5", "doc_id": "doc5"}])
+        assert store.count() == 300
+        assert store.search("document number 5", top_k=1)[0]["doc_id"] == "doc5"
+
+    def test_add_replaces_existing_doc_id(self, store: FAISSVectorStore) -> None:
+        """Test that adding an existing doc_id replaces its vector and metadata."""
+        store.add_documents([{"text": "replacement text", "doc_id": "doc7"}])
+
+        assert store.count() == 300
+        assert store.get_document("doc7")["text"] == "replacement text"
+        assert store.search("replacement text", top_k=1)[0]["doc_id"] == "doc7"
+
+    def test_search_batch_and_by_vector(self, store: FAISSVectorStore) -> None:
+        """Test that batch and vector search agree with single searches."""
+        queries = ["document number 1", "document number 2", "document number 1"]
+        batch = store.search_batch(queries, top_k=3)
+        by_vector = store.search_by_vector(HashEmbedder().encode(queries), top_k=3)
+
+        for query, batch_row, vector_row in zip(queries, batch, by_vector):
+            single = store.search(query, top_k=3)
+            assert [r["doc_id"] for r in batch_row] == [r["doc_id"] for r in single]
+            assert [r["doc_id"] for r in vector_row] == [r["doc_id"] for r in single]
+        assert store.search_batch([]) == []
+
+    def test_empty_store(self) -> None:
+        """Test searching a store with no documents."""
+        store = FAISSVectorStore(embedder=HashEmbedder())
+
+        assert store.search("anything") == []
+        assert store.search_by_vector(np.ones(32)) == [[]]
+
+    def test_save_and_load(self, store: FAISSVectorStore, tmp_path: Path) -> None:
+        """Test that a saved store loads with the same documents and results."""
+        path = str(tmp_path / "store")
+        store.delete_document("doc3")
+        store.save(path)
+
+        assert (tmp_path / "store.meta").read_bytes()[:1] == b"{"
+
+        loaded = FAISSVectorStore(embedder=HashEmbedder(), index_type=store.index_type)
+        loaded.load(path)
+
+        assert loaded.count() == 299
+        assert loaded.doc_ids == store.doc_ids
+        assert loaded.get_document("doc3") is None
+        query = "document number 42"
+        assert [r["doc_id"] for r in loaded.search(query)] == [
+            r["doc_id"] for r in store.search(query)
+        ]
+
+        # Ids keep increasing after a load, so new documents never collide
+        loaded.add_documents([{"text": "new document", "doc_id": "new"}])
+        assert loaded.search("new document", top_k=1)[0]["doc_id"] == "new"
+
+    def test_save_warns_about_non_json_metadata(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that metadata JSON cannot represent is named in a warning on save."""
+        store = FAISSVectorStore(embedder=HashEmbedder())
+        store.add_documents([
+            {
+                "text": "document number 1",
+                "doc_id": "doc1",
+                "metadata": {"created": datetime(2024, 5, 1), "tags": ["a", {"b"}], "n": 1},
+            },
+            {"text": "document number 2", "doc_id": "doc2", "metadata": {"n": 2}},
+        ])
+        path = str(tmp_path / "store")
+
+        with caplog.at_level(logging.WARNING, logger="secureai.rag.faiss_store"):
+            store.save(path)
+
+        assert "'doc1'['metadata']['created']" in caplog.text
+        assert "'doc1'['metadata']['tags'][1]" in caplog.text
+        assert "doc2" not in caplog.text
+
+        loaded = FAISSVectorStore(embedder=HashEmbedder())
+        loaded.load(path)
+        assert loaded.get_document("doc1")["metadata"] == {
+            "created": "2024-05-01 00:00:00", "tags": ["a", "{'b'}"], "n": 1
+        }
+        assert loaded.get_document("doc2")["metadata"] == {"n": 2}
+
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger="secureai.rag.faiss_store"):
+            loaded.save(path)
+        assert caplog.text == ""
+
+    def test_mmap_load_is_read_only(self, store: FAISSVectorStore, tmp_path: Path) -> None:
+        """Test that an mmapped store searches but refuses modification."""
+        path = str(tmp_path / "store")
+        store.save(path)
+
+        loaded = FAISSVectorStore(embedder=HashEmbedder(), index_type=store.index_type)
+        loaded.load(path, mmap=True)
+
+        assert loaded.search("document number 9", top_k=1)[0]["doc_id"] == "doc9"
+        with pytest.raises(RuntimeError, match="read-only"):
+            loaded.add_documents([{"text": "x", "doc_id": "x"}])
+        with pytest.raises(RuntimeError, match="read-only"):
+            loaded.delete_document("doc9")
+        assert loaded.count() == 300
+
+        loaded.clear()
+        loaded.add_documents([{"text": "x", "doc_id": "x"}])
+        assert loaded.count() == 1
+
+    def test_legacy_pickle_requires_opt_in(self, tmp_path: Path) -> None:
+        """Test that legacy pickle metadata loads only with allow_pickle=True."""
+        path = write_legacy_store(tmp_path, make_documents(3))
+
+        store = FAISSVectorStore(embedder=HashEmbedder())
+        with pytest.raises(ValueError, match="allow_pickle"):
+            store.load(path)
+
+        store.load(path, allow_pickle=True)
+        assert store.count() == 3
+        assert store.search("document number 1", top_k=1)[0]["doc_id"] == "doc1"
+
+    def test_clear_drops_query_cache(self, tmp_path: Path) -> None:
+        """Test that query vectors cached for a legacy L2 index are not reused after clear()."""
+        path = write_legacy_store(tmp_path, make_documents(3))
+        store = FAISSVectorStore(embedder=HashEmbedder())
+        store.load(path, allow_pickle=True)
+        store.search("document number 1")
+
+        store.clear()
+        store.add_documents(make_documents(3))
+        fresh = FAISSVectorStore(embedder=HashEmbedder())
+        fresh.add_documents(make_documents(3))
+
+        expected = fresh.search("document number 1")
+        results = store.search("document number 1")
+        assert [r["doc_id"] for r in results] == [r["doc_id"] for r in expected]
+        assert [r["score"] for r in results] == pytest.approx([r["score"] for r in expected])
+
+    def test_concurrent_search_with_query_cache(self) -> None:
+        """Test that concurrent searches share the query cache safely."""
+        store = FAISSVectorStore(embedder=HashEmbedder(), query_cache_size=4)
+        store.add_documents(make_documents(50))
+        errors = []
+
+        def search(offset: int) -> None:
+            try:
+                for i in range(300):
+                    queries = [f"document number {(i * offset + j) % 17}" for j in range(3)]
+                    store.search_batch(queries, top_k=2)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=search, args=(k,)) for k in range(1, 9)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert len(store._query_cache) <= 4
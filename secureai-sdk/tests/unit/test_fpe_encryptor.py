@@ -118,6 +118,16 @@ class TestFPEEncryptor:
         encryptor.clear_cache()
         assert len(encryptor._cache) == 0
 
+    def test_cache_is_bounded(self) -> None:
+        """Test that the cache keeps only the most recently used results."""
+        encryptor = FPEEncryptor(key="test-key", cache_size=2)
+        encryptor.encrypt("111-11-1111", "SSN")
+        encryptor.encrypt("222-22-2222", "SSN")
+        encryptor.encrypt("111-11-1111", "SSN")
+        encryptor.encrypt("333-33-3333", "SSN")
+        
+        assert list(encryptor._cache) == ["SSN:111-11-1111", "SSN:333-33-3333"]
+
     def test_encrypt_with_tweak(self) -> None:
         """Test encryption with custom tweak."""
         encryptor1 = FPEEncryptor(key="test-key", tweak="tweak1")
@@ -2,16 +2,37 @@
 
 import pytest
 import logging
+import re
 from io import StringIO
 from unittest.mock import Mock, patch
 
 from secureai.logging.filter import SecureAILogFilter, install_log_protection
-from secureai.detection.entities import EntityType
+from secureai.detection.pii_detector import PIIDetector
+from secureai.detection.entities import DetectionResult, EntityType, PIIEntity
 from secureai.encryption.strategies import MaskingStrategy
 from secureai.policy.manager import PolicyManager
 from secureai.policy.models import Policy, MaskingRule
 
 
+class CodenameDetector(PIIDetector):
+    """Detector that also finds project codenames, which the prescan cannot see."""
+
+    def detect(self, text: str) -> DetectionResult:
+        result = super().detect(text)
+        codenames = [
+            PIIEntity(
+                entity_type=EntityType.ORGANIZATION,
+                value=match.group(),
+                start=match.start(),
+                end=match.end(),
+                confidence=1.0,
+            )
+            for match in re.finditer(r"zulu-\w+", text)
+        ]
+        entities = sorted(result.entities + codenames, key=lambda e: e.start)
+        return DetectionResult(text=text, entities=entities)
+
+
 class TestSecureAILogFilter:
     """Test suite for SecureAILogFilter."""
 
@@ -54,6 +75,89 @@ class TestSecureAILogFilter:
         output = stream.getvalue()
         assert "This is a normal log message" in output
 
+    def test_filter_skips_detection_without_pii_markers(
+        self, log_filter: SecureAILogFilter
+    ) -> None:
+        """Test that prescan-negative messages never reach detect()."""
+        record = logging.LogRecord(
+            name="test",
+            level=logging.INFO,
+            pathname="",
+            lineno=0,
+            msg="heartbeat ok",
+            args=(),
+            exc_info=None,
+        )
+        
+        with patch.object(log_filter.detector, "detect") as detect_mock:
+            assert log_filter.filter(record) is True
+        
+        detect_mock.assert_not_called()
+        assert record.getMessage() == "heartbeat ok"
+
+    def test_filter_runs_overridden_detect(self) -> None:
+        """Test that a detector subclass with its own detect() is not prescanned away."""
+        log_filter = SecureAILogFilter(detector=CodenameDetector())
+        record = logging.LogRecord(
+            name="test",
+            level=logging.INFO,
+            pathname="",
+            lineno=0,
+            msg="badge holder zulu-kilo checked in",
+            args=(),
+            exc_info=None,
+        )
+        
+        log_filter.filter(record)
+        
+        assert "zulu-kilo" not in record.getMessage()
+        assert record.getMessage().startswith("badge holder ")
+
+    def test_filter_caches_repeated_messages(
+        self, log_filter: SecureAILogFilter
+    ) -> None:
+        """Test that a repeated message is protected once and reused."""
+        def make_record() -> logging.LogRecord:
+            return logging.LogRecord(
+                name="test",
+                level=logging.INFO,
+                pathname="",
+                lineno=0,
+                msg="User SSN is %s",
+                args=("123-45-6789",),
+                exc_info=None,
+            )
+        
+        first = make_record()
+        log_filter.filter(first)
+        
+        with patch.object(log_filter.detector, "detect") as detect_mock:
+            second = make_record()
+            log_filter.filter(second)
+        
+        detect_mock.assert_not_called()
+        assert second.getMessage() == first.getMessage()
+        assert "123-45-6789" not in second.getMessage()
+
+    def test_message_cache_does_not_keep_raw_messages(self) -> None:
+        """Test that the cache holds only digests and masked text, and can be disabled."""
+        log_filter = SecureAILogFilter()
+        log_filter._protect_cached("User SSN is 123-45-6789")
+
+        for key, value in log_filter._message_cache.items():
+            assert isinstance(key, bytes)
+            assert "123-45-6789" not in value
+
+        uncached = SecureAILogFilter(cache_size=0)
+        with patch.object(
+            uncached.detector, "detect", wraps=uncached.detector.detect
+        ) as detect_mock:
+            uncached._protect_cached("User SSN is 123-45-6789")
+            uncached._protect_cached("User SSN is 123-45-6789")
+
+        assert detect_mock.call_count == 2
+        assert len(uncached._message_cache) == 0
+
     def test_filter_masks_ssn(self, logger_with_filter: logging.Logger) -> None:
         """Test that SSN is masked in logs."""
         handler = logger_with_filter.handlers[0]
@@ -158,6 +262,61 @@ class TestSecureAILogFilter:
         # Message should be protected
         assert "123-45-6789" not in str(record.msg)
 
+    def test_filter_skips_already_protected_record(
+        self, log_filter: SecureAILogFilter
+    ) -> None:
+        """Test that a record is scanned only once across filters."""
+        record = logging.LogRecord(
+            name="test",
+            level=logging.INFO,
+            pathname="",
+            lineno=0,
+            msg="User SSN is %s",
+            args=("123-45-6789",),
+            exc_info=None,
+        )
+        log_filter.filter(record)
+        protected = record.getMessage()
+        
+        other_filter = SecureAILogFilter()
+        with patch.object(other_filter.detector, "might_contain_pii") as prescan_mock:
+            assert other_filter.filter(record) is True
+        
+        prescan_mock.assert_not_called()
+        assert record.getMessage() == protected
+
+    def test_filter_rescans_record_for_other_policy(
+        self, log_filter: SecureAILogFilter
+    ) -> None:
+        """Test that only PII-bearing records are marked, and only for one policy manager."""
+        def make_record(msg: str) -> logging.LogRecord:
+            return logging.LogRecord(
+                name="test",
+                level=logging.INFO,
+                pathname="",
+                lineno=0,
+                msg=msg,
+                args=(),
+                exc_info=None,
+            )
+
+        clean = make_record("heartbeat ok")
+        log_filter.filter(clean)
+        assert not hasattr(clean, SecureAILogFilter._PROTECTED_ATTR)
+
+        record = make_record("User SSN is 123-45-6789")
+        log_filter.filter(record)
+
+        with patch.object(PolicyManager, "_fetch_policy"):
+            policy_manager = PolicyManager(api_key="test", sync_interval=0)
+        other_filter = SecureAILogFilter(policy_manager=policy_manager)
+        with patch.object(
+            other_filter.detector, "might_contain_pii", return_value=False
+        ) as prescan_mock:
+            other_filter.filter(record)
+
+        prescan_mock.assert_called_once()
+
     def test_filter_always_returns_true(self, log_filter: SecureAILogFilter) -> None:
         """Test that filter always allows logs through."""
         record = logging.LogRecord(
@@ -237,9 +396,35 @@ class TestSecureAILogFilter:
         
         log_filter = SecureAILogFilter(policy_manager=policy_manager)
         strategy = log_filter._get_strategy_for_entity(EntityType.EMAIL)
-        
+
         assert strategy == MaskingStrategy.FULL_MASK
 
+    def test_strategy_cache_follows_policy_swap(self) -> None:
+        """Test that resolved strategies are dropped when the policy changes."""
+        policy = Policy(
+            policy_id="test",
+            name="Test",
+            rules=[
+                MaskingRule(
+                    entity_type=EntityType.EMAIL,
+                    strategy=MaskingStrategy.FULL_MASK,
+                    contexts=["logs"],
+                )
+            ],
+        )
+
+        with patch.object(PolicyManager, "_fetch_policy"):
+            policy_manager = PolicyManager(
+                api_key="test", sync_interval=0, fallback_policy=policy
+            )
+            policy_manager._policy = policy
+
+        log_filter = SecureAILogFilter(policy_manager=policy_manager)
+        assert log_filter._get_strategy_for_entity(EntityType.EMAIL) == MaskingStrategy.FULL_MASK
+
+        policy_manager._policy = Policy(policy_id="empty", name="Empty", rules=[])
+        assert log_filter._get_strategy_for_entity(EntityType.EMAIL) == MaskingStrategy.PARTIAL_MASK
+
     def test_get_strategy_for_entity_default(self, log_filter: SecureAILogFilter) -> None:
         """Test getting default strategy when no policy."""
         strategy = log_filter._get_strategy_for_entity(EntityType.SSN)
@@ -280,6 +465,17 @@ class TestInstallLogProtection:
         
         assert filter_instance in logger.filters
 
+    def test_install_is_idempotent(self) -> None:
+        """Test that installing twice reuses the installed filter."""
+        logger = logging.getLogger("idempotent_logger")
+        logger.filters.clear()
+        
+        first = install_log_protection(logger=logger)
+        second = install_log_protection(logger=logger)
+        
+        assert second is first
+        assert logger.filters == [first]
+
     def test_install_with_policy_manager(self) -> None:
         """Test installing with policy manager."""
         policy = Policy(policy_id="test", name="Test", rules=[])
@@ -190,6 +190,36 @@ class TestPIIDetector:
         assert len(email_entities) >= 1
         assert all(e.entity_type == EntityType.EMAIL for e in email_entities)
 
+    def test_detect_by_type_keeps_enabled_types(self, detector: PIIDetector) -> None:
+        """Test that detect_by_type doesn't change detector state."""
+        text = "Email: john@example.com, SSN: 123-45-6789"
+        enabled_before = set(detector.enabled_types)
+
+        detector.detect_by_type(text, EntityType.EMAIL)
+
+        assert detector.enabled_types == enabled_before
+        assert detector.has_pii(text) is True
+        assert detector.get_entity_counts(text)[EntityType.SSN] == 1
+
+    def test_detect_by_type_ignores_enabled_types(self) -> None:
+        """Test that detect_by_type finds a type the detector does not enable."""
+        detector = PIIDetector(enabled_types={EntityType.EMAIL})
+
+        ssn_entities = detector.detect_by_type("SSN 123-45-6789", EntityType.SSN)
+
+        assert [e.value for e in ssn_entities] == ["123-45-6789"]
+
+    def test_detect_by_type_keeps_overlapped_matches(self, detector: PIIDetector) -> None:
+        """Test that a match is returned even if detect() resolves it to another type."""
+        bank_entities = detector.detect_by_type("ref 5551234567 x", EntityType.BANK_ACCOUNT)
+        zip_entities = detector.detect_by_type("call 12345-6789 x", EntityType.ZIP_CODE)
+
+        assert [e.value for e in bank_entities] == ["5551234567"]
+        assert [e.value for e in zip_entities] == ["12345-6789"]
+
+        bank_entities.clear()
+        assert len(detector.detect_by_type("ref 5551234567 x", EntityType.BANK_ACCOUNT)) == 1
+
     def test_get_entity_counts(self, detector: PIIDetector) -> None:
         """Test entity counting."""
         text = "Emails: john@test.com, jane@test.com. SSN: 123-45-6789"
@@ -213,6 +243,59 @@ class TestPIIDetector:
         # Just verify it returns a boolean
         assert isinstance(result, bool)
 
+    def test_might_contain_pii(self, detector: PIIDetector) -> None:
+        """Test that the prescan never rules out text with detectable PII."""
+        texts = [
+            "My email is test@example.com",
+            "SSN: 123-45-6789",
+            "MAC aa:bb:cc:dd:ee:ff",
+            "password: hunter2",
+            "Contact John Smith",
+        ]
+        for text in texts:
+            assert detector.has_pii(text)
+            assert detector.might_contain_pii(text) is True
+        
+        assert detector.might_contain_pii("loaded config ok") is False
+
+    def test_might_contain_pii_with_overridden_detect(self) -> None:
+        """Test that the built-in prescan is skipped when detect() is overridden."""
+        class CustomDetector(PIIDetector):
+            def detect(self, text: str) -> DetectionResult:
+                return super().detect(text)
+
+        class CustomPrescanDetector(CustomDetector):
+            def might_contain_pii(self, text: str) -> bool:
+                return "zulu" in text
+
+        assert CustomDetector().might_contain_pii("loaded config ok") is True
+        assert CustomPrescanDetector().might_contain_pii("loaded config ok") is False
+
+    def test_detect_batch(self, detector: PIIDetector) -> None:
+        """Test that batch detection matches detect() per text, in order."""
+        texts = ["SSN: 123-45-6789", "loaded config ok", "", "SSN: 123-45-6789"]
+        results = detector.detect_batch(texts)
+
+        assert [r.text for r in results] == texts
+        for text, result in zip(texts, results):
+            assert result.entities == detector.detect(text).entities
+        assert results[0] is results[3]
+
+    def test_anchors_do_not_change_results(self, detector: PIIDetector) -> None:
+        """Test that skipping patterns by anchor finds the same entities as a full scan."""
+        unanchored = PIIDetector()
+        unanchored._scan_plan = [
+            (etype, pattern, None) for etype, pattern, _ in unanchored._scan_plan
+        ]
+        texts = [
+            "Contact John Smith about the roadmap",
+            "Email jane@test.com, MRN: 1234567, api_key=abcdefghijklmnopqrstuvwxyz",
+            "Visit https://example.com/x or 192.168.1.1, MAC aa:bb:cc:dd:ee:ff",
+            "token eyJhbGciOiJIUzI1NiJ9.eyJzdWIiOiIxIn0.abc and PASSWORD=hunter22",
+        ]
+        for text in texts:
+            assert detector.detect(text).entities == unanchored.detect(text).entities
+
     def test_luhn_validation(self, detector: PIIDetector) -> None:
         """Test Luhn algorithm validation for credit cards."""
         # Valid credit card (passes Luhn)
@@ -221,6 +304,15 @@ class TestPIIDetector:
         # Invalid credit card (fails Luhn)
         assert detector._validate_luhn("4532015112830367") is False
 
+    def test_luhn_validation_non_ascii_digits(self, detector: PIIDetector) -> None:
+        """Test that Luhn validation counts the non-ASCII digits the patterns match."""
+        assert detector._validate_luhn("4١١١ ١١١١ ١١١١ ١١١١") is True
+        assert detector._validate_luhn("4١١١ ١١١١ ١١١١ ١١١٢") is False
+
+        cards = detector.detect_by_type("Card 4١١١ ١١١١ ١١١١ ١١١١", EntityType.CREDIT_CARD)
+        assert len(cards) == 1
+        assert cards[0].confidence == 1.0
+
     def test_remove_duplicates(self, detector: PIIDetector) -> None:
         """Test duplicate removal."""
         entities = [
@@ -1,11 +1,12 @@
 """Unit tests for Policy Manager."""
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, PropertyMock
 from datetime import datetime
+from typing import Iterator
 import httpx
 
-from secureai.policy.manager import PolicyManager
+from secureai.policy.manager import PolicyManager, _SyncScheduler
 from secureai.policy.models import Policy, MaskingRule
 from secureai.detection.entities import EntityType
 from secureai.encryption.strategies import MaskingStrategy
@@ -80,6 +81,18 @@ class TestPolicyManager:
             assert policy.policy_id == "default"
             assert len(policy.rules) > 0
 
+    def test_client_uses_environment_proxy(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that HTTPS_PROXY from the environment is honored by the client."""
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy.example:3128")
+        with patch.object(PolicyManager, "_fetch_policy", side_effect=Exception("Network error")):
+            manager = PolicyManager(api_key="test_key", sync_interval=0)
+
+        assert any(
+            pattern.matches(httpx.URL("https://api.secureai.com"))
+            for pattern in manager._client._mounts
+        )
+        manager.stop()
+
     def test_create_default_policy(self, manager_no_sync: PolicyManager) -> None:
         """Test default policy creation."""
         policy = manager_no_sync._create_default_policy()
@@ -137,11 +150,35 @@ class TestPolicyManager:
         # Should return None because context doesn't match
         # unless "all" is in contexts
 
+    def test_get_rules_batch(self, manager_no_sync: PolicyManager) -> None:
+        """Test resolving several rules in one call."""
+        rules = manager_no_sync.get_rules_batch(
+            [(EntityType.SSN, "logs"), (EntityType.EMAIL, "api"), (EntityType.EMAIL, "logs")]
+        )
+        
+        assert [rule.strategy if rule else None for rule in rules] == [
+            MaskingStrategy.FPE,
+            None,
+            MaskingStrategy.PARTIAL_MASK,
+        ]
+
+    def test_get_rule_cache_follows_policy_swap(self, manager_no_sync: PolicyManager) -> None:
+        """Test that cached rules are dropped when the policy is replaced."""
+        assert manager_no_sync.get_rule(EntityType.SSN).strategy == MaskingStrategy.FPE
+        
+        manager_no_sync._policy = Policy(
+            policy_id="swapped",
+            name="Swapped",
+            rules=[MaskingRule(entity_type=EntityType.SSN, strategy=MaskingStrategy.REDACT)],
+        )
+        
+        assert manager_no_sync.get_rule(EntityType.SSN).strategy == MaskingStrategy.REDACT
+
     @patch("httpx.Client.get")
     def test_fetch_policy_success(self, mock_get: Mock, mock_policy: Policy) -> None:
         """Test successful policy fetch."""
         mock_response = Mock()
-        mock_response.json.return_value = mock_policy.model_dump()
+        mock_response.content = mock_policy.model_dump_json().encode()
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
         
@@ -155,11 +192,11 @@ class TestPolicyManager:
         """Test fetch when policy is up to date."""
         # First call returns policy, second returns up_to_date
         first_response = Mock()
-        first_response.json.return_value = mock_policy.model_dump()
+        first_response.content = mock_policy.model_dump_json().encode()
         first_response.raise_for_status = Mock()
         
         second_response = Mock()
-        second_response.json.return_value = {"status": "up_to_date"}
+        second_response.content = b'{"status": "up_to_date"}'
         second_response.raise_for_status = Mock()
         
         mock_get.side_effect = [first_response, second_response]
@@ -178,6 +215,31 @@ class TestPolicyManager:
         policy = manager.get_policy()
         assert policy.policy_id == "test_policy"  # Still same policy
 
+    @patch("httpx.Client.get")
+    def test_fetch_policy_not_modified_etag(
+        self, mock_get: Mock, mock_policy: Policy
+    ) -> None:
+        """Test conditional fetch with ETag and a bodyless 304."""
+        first_response = Mock()
+        first_response.status_code = 200
+        first_response.headers = {"ETag": '"v1"'}
+        first_response.content = mock_policy.model_dump_json().encode()
+        first_response.raise_for_status = Mock()
+        
+        second_response = Mock()
+        second_response.status_code = 304
+        type(second_response).content = PropertyMock(
+            side_effect=AssertionError("304 has no body")
+        )
+        
+        mock_get.side_effect = [first_response, second_response]
+        
+        manager = PolicyManager(api_key="test_key", sync_interval=0)
+        manager.refresh()
+        
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert manager.get_policy().policy_id == "test_policy"
+
     @patch("httpx.Client.get")
     def test_fetch_policy_network_error_offline_mode(
         self, mock_get: Mock, mock_policy: Policy
@@ -217,7 +279,7 @@ class TestPolicyManager:
         updated_policy = mock_policy.model_copy(update={"version": "2.0.0"})
         
         mock_response = Mock()
-        mock_response.json.return_value = updated_policy.model_dump()
+        mock_response.content = updated_policy.model_dump_json().encode()
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
         
@@ -234,6 +296,30 @@ class TestPolicyManager:
         policy = manager.get_policy()
         assert policy.version == "2.0.0"
 
+    def test_next_sync_interval_adapts(self, manager_no_sync: PolicyManager) -> None:
+        """Test that the sync interval stretches for stable policies and slow links."""
+        manager_no_sync.sync_interval = 10
+        assert manager_no_sync._next_sync_interval() == 10
+        
+        manager_no_sync._unchanged_streak = 8
+        assert manager_no_sync._next_sync_interval() == 30
+        
+        manager_no_sync._rtt_window.append(2.0)
+        assert manager_no_sync._next_sync_interval() == 100  # Capped at 10x
+
+    def test_failure_backoff(self, manager_no_sync: PolicyManager) -> None:
+        """Test that retries back off exponentially with bounded jitter."""
+        manager_no_sync.sync_interval = 10
+        
+        manager_no_sync._failure_count = 1
+        assert 20 <= manager_no_sync._failure_backoff() <= 21
+        
+        manager_no_sync._failure_count = 3
+        assert 80 <= manager_no_sync._failure_backoff() <= 81
+        
+        manager_no_sync._failure_count = 50
+        assert 1800 <= manager_no_sync._failure_backoff() <= 1801
+
     def test_get_sync_status(self, manager_no_sync: PolicyManager) -> None:
         """Test getting sync status."""
         status = manager_no_sync.get_sync_status()
@@ -253,6 +339,67 @@ class TestPolicyManager:
         manager_no_sync.stop()
         # Should not raise any errors
 
+    @pytest.fixture
+    def scheduler(self) -> Iterator[_SyncScheduler]:
+        """Create a standalone sync scheduler, stopped after the test."""
+        scheduler = _SyncScheduler()
+        yield scheduler
+        scheduler.stop(timeout=5)
+        assert not scheduler.is_alive()
+
+    def test_scheduler_survives_failing_sync(
+        self, mock_policy: Policy, scheduler: _SyncScheduler
+    ) -> None:
+        """Test that an exception from one manager's sync doesn't stop the others."""
+        import threading
+
+        with patch.object(PolicyManager, "_fetch_policy"):
+            failing = PolicyManager(api_key="a", sync_interval=0, fallback_policy=mock_policy)
+            healthy = PolicyManager(api_key="b", sync_interval=0, fallback_policy=mock_policy)
+        synced = threading.Event()
+        failing._sync_once = Mock(side_effect=RuntimeError("boom"))
+        healthy._sync_once = Mock(side_effect=lambda: synced.set() or 3600.0)
+
+        scheduler.schedule(failing, 0)
+        scheduler.schedule(healthy, 0.05)
+
+        assert synced.wait(5)
+        assert scheduler.is_alive()
+        failing.stop()
+        healthy.stop()
+
+    def test_stop_waits_for_running_sync(
+        self, mock_policy: Policy, scheduler: _SyncScheduler
+    ) -> None:
+        """Test that stop() closes the client only after an in-flight sync."""
+        import threading
+
+        with patch.object(PolicyManager, "_fetch_policy"):
+            manager = PolicyManager(api_key="a", sync_interval=0, fallback_policy=mock_policy)
+        started = threading.Event()
+        release = threading.Event()
+        closed_during_sync = []
+
+        def slow_sync() -> float:
+            started.set()
+            release.wait(5)
+            closed_during_sync.append(manager._client.is_closed)
+            return 3600.0
+
+        manager._sync_once = slow_sync
+        scheduler.schedule(manager, 0)
+        assert started.wait(5)
+
+        stopper = threading.Thread(target=manager.stop)
+        stopper.start()
+        stopper.join(0.1)
+        assert stopper.is_alive()  # Blocked on the running sync
+
+        release.set()
+        stopper.join(5)
+        assert closed_during_sync == [False]
+        assert manager._client.is_closed
+
     def test_thread_safety(self, mock_policy: Policy) -> None:
         """Test thread-safe policy access."""
         import threading
@@ -1,13 +1,37 @@
 """Unit tests for RAG protection module."""
 
+import re
+from unittest.mock import patch
+
 import pytest
 
+from secureai.core.substitution import compile_replacements
 from secureai.rag.protector import RAGProtector, Document
 from secureai.rag.vector_db import VectorDBType
-from secureai.detection.entities import PIIEntity, EntityType
+from secureai.detection.pii_detector import PIIDetector
+from secureai.detection.entities import DetectionResult, PIIEntity, EntityType
 from secureai.core.exceptions import SecureAIError
 
 
+class CodenameDetector(PIIDetector):
+    """Detector that also finds project codenames, which the prescan cannot see."""
+
+    def detect(self, text: str) -> DetectionResult:
+        result = super().detect(text)
+        codenames = [
+            PIIEntity(
+                entity_type=EntityType.ORGANIZATION,
+                value=match.group(),
+                start=match.start(),
+                end=match.end(),
+                confidence=1.0,
+            )
+            for match in re.finditer(r"zulu-\w+", text)
+        ]
+        entities = sorted(result.entities + codenames, key=lambda e: e.start)
+        return DetectionResult(text=text, entities=entities)
+
+
 class TestDocument:
     """Test suite for Document model."""
 
@@ -74,6 +98,31 @@ class TestRAGProtector:
         assert len(protected) == 3
         assert all(doc.doc_id in ["doc1", "doc2", "doc3"] for doc in protected)
 
+    def test_protect_and_index_with_workers(self, rag: RAGProtector) -> None:
+        """Test that parallel detection gives the same documents as serial."""
+        docs = [
+            {"text": f"Patient {i} SSN 123-45-{6700 + i} has diabetes", "id": f"doc{i}"}
+            for i in range(100)
+        ]
+
+        serial = RAGProtector().protect_and_index(docs)
+        parallel = rag.protect_and_index(docs, workers=2)
+
+        assert [(d.doc_id, d.text) for d in parallel] == [(d.doc_id, d.text) for d in serial]
+        assert rag.get_indexed_count() == 100
+
+    def test_protect_and_index_stream(self, rag: RAGProtector) -> None:
+        """Test that streaming indexes one batch at a time as documents are consumed."""
+        docs = ({"text": f"Note {i}", "id": f"doc{i}"} for i in range(100))
+
+        stream = rag.protect_and_index_stream(docs)
+        first = next(stream)
+
+        assert first.doc_id == "doc0"
+        assert rag.get_indexed_count() == RAGProtector._INDEX_BATCH_SIZE
+        assert len(list(stream)) == 99
+        assert rag.get_indexed_count() == 100
+
     def test_protect_document_with_no_pii(self, rag: RAGProtector) -> None:
         """Test protecting document with no PII."""
         doc = Document(
@@ -152,7 +201,19 @@ class TestRAGProtector:
         
         # Should be in vector store
         assert len(rag._vector_store) == 1
-        assert "test_index:doc1" in rag._vector_store
+        assert "doc1" in rag._vector_store["test_index"]
+
+    def test_indexes_are_isolated(self, rag: RAGProtector) -> None:
+        """Test that an index name that prefixes another does not see its documents."""
+        rag._index_document(Document(text="shared words", doc_id="a"), VectorDBType.MEMORY, "default")
+        rag._index_document(Document(text="shared words", doc_id="b"), VectorDBType.MEMORY, "default_v2")
+        
+        assert rag.get_indexed_count("default") == 1
+        assert [d["doc_id"] for d in rag._search("shared", VectorDBType.MEMORY, "default", 5)] == ["a"]
+        
+        rag.clear_index("default")
+        assert rag.get_indexed_count("default") == 0
+        assert rag.get_indexed_count("default_v2") == 1
 
     def test_query_with_no_results(self, rag: RAGProtector) -> None:
         """Test query with no matching documents."""
@@ -191,6 +252,16 @@ class TestRAGProtector:
         # Query should be protected
         assert result["protected_query"] != result["query"]
 
+    def test_query_with_custom_detector(self) -> None:
+        """Test that PII only a detector subclass finds is protected in queries."""
+        rag = RAGProtector(detector=CodenameDetector())
+        rag.protect_and_index([{"text": "Budget notes for zulu-kilo", "id": "doc1"}])
+        
+        result = rag.query("what did zulu-kilo say")
+        
+        assert "zulu-kilo" not in result["protected_query"]
+        assert result["num_results"] == 1
+
     def test_query_with_auto_decrypt(self, rag: RAGProtector) -> None:
         """Test query with auto-decryption enabled."""
         # Index documents
@@ -208,6 +279,43 @@ class TestRAGProtector:
             assert any("John" in doc["text"] or "Smith" in doc["text"] 
                       for doc in result["documents"])
 
+    def test_decrypt_results_uses_document_tokens(self, rag: RAGProtector) -> None:
+        """Test that indexed results are restored from their own tokens only."""
+        rag.protect_and_index([{"text": "User SSN is 123-45-6789", "id": "doc1"}])
+        tokens = rag._doc_tokens[("default", "doc1")]
+        
+        assert len(tokens) == 1
+        assert rag._entity_map[tokens[0]] == "123-45-6789"
+        
+        # A token from another document is left alone
+        rag._entity_map["unrelated"] = "secret"
+        results = [{"text": f"User SSN is {tokens[0]} unrelated", "doc_id": "doc1"}]
+        decrypted = rag._decrypt_results(results, "default")
+        
+        assert decrypted[0]["text"] == "User SSN is 123-45-6789 unrelated"
+
+    def test_decrypt_results_reuses_document_restorer(self, rag: RAGProtector) -> None:
+        """Test that a document's replacer is compiled once and rebuilt when it changes."""
+        rag.protect_and_index([{"text": "User SSN is 123-45-6789", "id": "doc1"}])
+        token = rag._doc_tokens[("default", "doc1")][0]
+        results = [{"text": f"User SSN is {token}", "doc_id": "doc1"}]
+        
+        with patch(
+            "secureai.rag.protector.compile_replacements", wraps=compile_replacements
+        ) as compile_mock:
+            for _ in range(3):
+                decrypted = rag._decrypt_results(results, "default")
+                assert decrypted[0]["text"] == "User SSN is 123-45-6789"
+            assert compile_mock.call_count == 1
+            
+            # Re-indexing the document drops its cached replacer
+            rag.protect_and_index([{"text": "User SSN is 123-45-6789", "id": "doc1"}])
+            rag._decrypt_results(results, "default")
+            assert compile_mock.call_count == 2
+        
+        rag.clear_index("default")
+        assert rag._doc_restorers == {}
+
     def test_search_simple_matching(self, rag: RAGProtector) -> None:
         """Test simple keyword search."""
         # Index documents
@@ -276,6 +384,16 @@ class TestRAGProtector:
         
         assert len(rag._entity_map) == 0
 
+    def test_bounded_entity_map(self) -> None:
+        """Test that a bounded entity map drops the least recently used value."""
+        rag = RAGProtector(max_entity_map_size=2)
+        rag._remember("enc1", "one")
+        rag._remember("enc2", "two")
+        rag._remember("enc1", "one")
+        rag._remember("enc3", "three")
+
+        assert rag.get_entity_map() == {"enc1": "one", "enc3": "three"}
+
     def test_get_indexed_count(self, rag: RAGProtector) -> None:
         """Test getting indexed document count."""
         docs = [
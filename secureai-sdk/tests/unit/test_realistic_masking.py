@@ -0,0 +1,110 @@
+"""Unit tests for RealisticMasker module."""
+
+import re
+
+import pytest
+from secureai.encryption.realistic_masking import RealisticMasker
+from secureai.detection.entities import EntityType
+
+
+class TestRealisticMasker:
+    """Test suite for RealisticMasker."""
+
+    @pytest.fixture
+    def masker(self) -> RealisticMasker:
+        """Create a masker instance for testing."""
+        return RealisticMasker()
+
+    def test_person_name_format(self, masker: RealisticMasker) -> None:
+        """Test that names map to table names, keeping one or two parts."""
+        full = masker.mask_value("Ramesh Kumar", EntityType.PERSON)
+        first, last = full.split(" ")
+        assert first in RealisticMasker.INDIAN_FIRST_NAMES_MALE
+        assert last in RealisticMasker.INDIAN_LAST_NAMES
+
+        single = masker.mask_value("Ramesh", EntityType.PERSON)
+        assert single in RealisticMasker.INDIAN_FIRST_NAMES_MALE
+
+        # Middle names are dropped; first and last part decide the result
+        assert masker.mask_value("Ramesh Lal Kumar", EntityType.PERSON) == full
+
+    def test_doctor_name_format(self, masker: RealisticMasker) -> None:
+        """Test that doctor names map to the doctor table."""
+        for name in ("Dr. Priya Mehta", "doctor Rao"):
+            assert masker.mask_value(name, EntityType.PERSON) in RealisticMasker.DOCTOR_NAMES
+
+    def test_phone_format(self, masker: RealisticMasker) -> None:
+        """Test that phone masking replaces digits and keeps separators."""
+        phone = "+91-9876543210"
+        fake = masker.mask_value(phone, EntityType.PHONE)
+
+        assert len(fake) == len(phone)
+        assert re.sub(r"\d", "0", fake) == re.sub(r"\d", "0", phone)
+        assert fake != phone
+
+    def test_address_format(self, masker: RealisticMasker) -> None:
+        """Test that addresses map to the address table."""
+        fake = masker.mask_value("12 Park Street, Kolkata", EntityType.ADDRESS)
+        assert fake in RealisticMasker.ADDRESSES
+
+    def test_patient_id_format(self, masker: RealisticMasker) -> None:
+        """Test that ID masking replaces digits and keeps the prefix and layout."""
+        patient_id = "HSP20251007-1452"
+        fake = masker.mask_value(patient_id, EntityType.NATIONAL_ID)
+
+        assert fake.startswith("HSP")
+        assert re.sub(r"\d", "0", fake) == re.sub(r"\d", "0", patient_id)
+        assert fake != patient_id
+
+        # Longer than one digest of digits
+        long_id = "ID-" + "7" * 80
+        assert re.fullmatch(r"ID-\d{80}", masker.mask_patient_id(long_id))
+
+    def test_other_types_unchanged(self, masker: RealisticMasker) -> None:
+        """Test that types without realistic masking pass through."""
+        assert masker.mask_value("123-45-6789", EntityType.SSN) == "123-45-6789"
+
+    def test_known_outputs(self, masker: RealisticMasker) -> None:
+        """Test that outputs stay stable across releases."""
+        assert masker.mask_value("Ramesh Kumar", EntityType.PERSON) == "Vikram Shah"
+        assert masker.mask_value("Dr. Priya Mehta", EntityType.PERSON) == "Dr. Deepa Kapoor"
+        assert masker.mask_value("+91-9876543210", EntityType.PHONE) == "+27-2237460429"
+        assert masker.mask_value("HSP20251007-1452", EntityType.NATIONAL_ID) == "HSP57246025-4285"
+
+    def test_deterministic_across_instances(self, masker: RealisticMasker) -> None:
+        """Test that the same input maps to the same fake value on any instance."""
+        other = RealisticMasker()
+        values = [
+            ("Ramesh Kumar", EntityType.PERSON),
+            ("Dr. Priya Mehta", EntityType.PERSON),
+            ("+91-9876543210", EntityType.PHONE),
+            ("12 Park Street, Kolkata", EntityType.ADDRESS),
+            ("HSP20251007-1452", EntityType.NATIONAL_ID),
+        ]
+        for value, entity_type in values:
+            first = masker.mask_value(value, entity_type)
+            assert masker.mask_value(value, entity_type) == first
+            assert other.mask_value(value, entity_type) == first
+
+    def test_reverse_mapping(self, masker: RealisticMasker) -> None:
+        """Test that the reverse mapping restores masked names."""
+        fake_name = masker.mask_value("Ramesh Kumar", EntityType.PERSON)
+        fake_doctor = masker.mask_value("Dr. Priya Mehta", EntityType.PERSON)
+        masker.mask_value("+91-9876543210", EntityType.PHONE)
+
+        reverse = masker.get_reverse_mapping()
+        assert reverse == {fake_name: "Ramesh Kumar", fake_doctor: "Dr. Priya Mehta"}
+
+        # The returned dict is a copy
+        reverse.clear()
+        assert masker.get_reverse_mapping()[fake_name] == "Ramesh Kumar"
+
+    def test_custom_patient_id_type_names(self, masker: RealisticMasker) -> None:
+        """Test that non-enum type names containing PATIENT or ID mask like IDs."""
+        patient_id = "HSP20251007-1452"
+        expected = masker.mask_patient_id(patient_id)
+
+        assert masker.mask_value(patient_id, "PATIENT_ID") == expected
+        assert masker.mask_value(patient_id, "MRN_PATIENT_ID") == expected
+        assert masker.mask_value(patient_id, "NATIONAL_ID") == expected
+        assert masker.mask_value(patient_id, "SSN") == patient_id
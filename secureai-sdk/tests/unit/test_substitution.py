@@ -0,0 +1,68 @@
+"""Unit tests for multi-pattern substitution."""
+
+import pytest
+from secureai.core import substitution
+from secureai.core.substitution import compile_replacements, replace_all
+
+
+class TestReplaceAll:
+    """Test suite for replace_all."""
+
+    def test_replaces_every_key(self) -> None:
+        """Test that all occurrences of all keys are replaced."""
+        replacements = {"987-65-4321": "123-45-6789", "jane@test.com": "john@example.com"}
+        text = "SSN 987-65-4321 belongs to jane@test.com (987-65-4321)"
+
+        assert replace_all(text, replacements) == (
+            "SSN 123-45-6789 belongs to john@example.com (123-45-6789)"
+        )
+
+    def test_longest_key_wins(self) -> None:
+        """Test that a key that prefixes another does not shadow it."""
+        replacements = {"TOK_1": "short", "TOK_12": "long"}
+
+        assert replace_all("TOK_12 TOK_1", replacements) == "long short"
+
+    def test_replacements_are_not_rescanned(self) -> None:
+        """Test that inserted values are not replaced again."""
+        replacements = {"a": "b", "b": "c"}
+
+        assert replace_all("ab", replacements) == "bc"
+
+    def test_compiled_replacer_is_reusable(self) -> None:
+        """Test that a compiled mapping applies to many texts and is a snapshot."""
+        replacements = {"TOK_1": "one"}
+        replace = compile_replacements(replacements)
+        replacements["TOK_2"] = "two"
+
+        assert replace("TOK_1 TOK_2") == "one TOK_2"
+        assert replace("") == ""
+        assert compile_replacements({})("text") == "text"
+
+    def test_empty_inputs(self) -> None:
+        """Test empty text and empty mapping."""
+        assert replace_all("", {"a": "b"}) == ""
+        assert replace_all("text", {}) == "text"
+
+    @pytest.mark.skipif(
+        not substitution.AHOCORASICK_AVAILABLE, reason="pyahocorasick not installed"
+    )
+    def test_automaton_matches_regex_fallback(self) -> None:
+        """Test that both backends agree on overlapping keys."""
+        replacements = {"ba": "0", "b": "1", "abbb": "2", "": "x"}
+        automaton = compile_replacements(replacements, backend="automaton")
+        regex = compile_replacements(replacements, backend="regex")
+
+        for text in ("bcbcabababbccccabb", "TOK_12 ab", ""):
+            assert automaton(text) == regex(text)
+        assert regex("abbbab") == "2a1"
+
+    def test_backend_selection(self) -> None:
+        """Test explicit backend errors and the regex backend without pyahocorasick."""
+        with pytest.raises(ValueError):
+            compile_replacements({"a": "b"}, backend="unknown")
+
+        if not substitution.AHOCORASICK_AVAILABLE:
+            with pytest.raises(ImportError):
+                compile_replacements({"a": "b"}, backend="automaton")
+        assert compile_replacements({"a": "b"}, backend="regex")("aa") == "bb"